@@ -1,6 +1,5 @@
 import os
 from flask import Flask
-from flask_pymongo import PyMongo
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
 from bson.objectid import ObjectId
@@ -9,8 +8,8 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-# Initialize extensions
-mongo = PyMongo()
+# Initialize extensions; the Mongo client is created lazily in each worker process
+from .db import mongo
 bcrypt = Bcrypt()
 login_manager = LoginManager()
 login_manager.login_view = "main.login"
@@ -20,8 +19,13 @@ def create_app():
     app.config['MONGO_URI'] = os.getenv('MONGO_URI')
     app.secret_key = os.getenv('SECRET_KEY')
 
+    # Timing spans, slow-request log and /metrics; the Mongo listener must
+    # be registered before any MongoClient is created
+    from .metrics import init_metrics, register_mongo_listener
+    register_mongo_listener()
+    init_metrics(app)
+
     # Initialize with app
-    mongo.init_app(app)
     bcrypt.init_app(app)
     login_manager.init_app(app)
 
@@ -29,7 +33,7 @@ def create_app():
     from .models import User
     @login_manager.user_loader
     def load_user(user_id):
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+        user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"username": 1, "email": 1})
         return User(user) if user else None
 
     # Register blueprints
@@ -39,4 +43,10 @@ def create_app():
     from .medicine_routes import medicine_bp
     app.register_blueprint(medicine_bp)
 
+    # `flask --app wsgi warmup` creates indexes and primes caches
+    @app.cli.command("warmup")
+    def warmup_command():
+        from .warmup import warm_up
+        warm_up()
+
     return app
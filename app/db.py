@@ -1,7 +1,96 @@
 # db.py
+import os
+import threading
 from pymongo import MongoClient
 
-client = MongoClient("mongodb://localhost:27017/")
-db = client["med_info_db"]
-drug_collection = db["drugs"]
+DEFAULT_MONGO_URI = "mongodb://localhost:27017/drug_info_app"
+DEFAULT_DB_NAME = "drug_info_app"
 
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def client_options():
+    """MongoClient pool sizes and timeouts, tunable per deployment."""
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "20")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+        "waitQueueTimeoutMS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")),
+        "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "3000")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        "socketTimeoutMS": int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000")),
+        "appname": "med-info-web-app",
+    }
+
+
+# ✅ One lazily created client per process
+def get_client():
+    """
+    Return this process's MongoClient, creating it on first use. A client
+    inherited across fork() is never reused: each pre-forked worker opens
+    its own pool the first time it touches the database.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                _client = MongoClient(os.getenv("MONGO_URI", DEFAULT_MONGO_URI), connect=False, **client_options())
+                _client_pid = pid
+    return _client
+
+
+def close_client():
+    global _client, _client_pid
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client, _client_pid = None, None
+
+
+def _forget_parent_client():
+    # The parent's sockets and monitor threads don't survive fork; drop the reference
+    global _client, _client_pid, _lock
+    _client, _client_pid, _lock = None, None, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_parent_client)
+
+
+def get_db():
+    """The app database named in MONGO_URI (users, medicines, caches, indexes)."""
+    return get_client().get_default_database(default=DEFAULT_DB_NAME)
+
+
+def get_drug_collection():
+    """The imported openFDA label catalogue, on the same client."""
+    return get_client()[os.getenv("DRUGS_DB_NAME", "med_info_db")]["drugs"]
+
+
+class Mongo:
+    """
+    Drop-in for the Flask-PyMongo handle (`mongo.db`, `mongo.cx`) backed by
+    the per-process client above. Assigning `mongo.db` swaps in another
+    database object, which the benchmarks use for their stand-in.
+    """
+
+    def __init__(self):
+        self._db = None
+
+    @property
+    def cx(self):
+        return get_client()
+
+    @property
+    def db(self):
+        return self._db if self._db is not None else get_db()
+
+    @db.setter
+    def db(self, database):
+        self._db = database
+
+
+mongo = Mongo()
@@ -1,35 +1,267 @@
 # app/medicine_routes.py
 
-from flask import Blueprint, request, render_template, current_app
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from flask import Blueprint, Response, request, render_template, current_app, jsonify
+from pymongo.errors import DuplicateKeyError
 from . import mongo
-from app.utils.api_clients import get_fda_data, get_rxcui, get_interactions
+from app.db import get_drug_collection
+from app.utils.api_clients import _lookup_rxcui, fetch_interactions, fetch_medicine_info, get_rxcui, map_concurrent
+from app.utils.helpers import normalize_drug_name
+from app.utils.interactions import InteractionIndex
+from app.utils.labels import label_to_medicine, load_label, store_label_blobs
+from app.utils.search import RESULT_PROJECTION, ensure_search_indexes, to_result
+from app.utils.suggest import SuggestIndex
 
 medicine_bp = Blueprint("medicine", __name__, url_prefix="/medicine")
 
+interaction_index = InteractionIndex(lambda: mongo.db)
+suggest_index = SuggestIndex(lambda: [mongo.db.medicines, get_drug_collection()],
+                             refresh_interval=int(os.getenv("SUGGEST_REFRESH_INTERVAL", "30")))
+MAX_INTERACTION_DRUGS = 50
+MAX_BATCH_NAMES = 500
+BATCH_CONCURRENCY = 8
+_UNAVAILABLE = object()  # map_concurrent result for a lookup that failed
+
+
+MEDICINE_PROJECTION = dict(RESULT_PROJECTION, _id=0, interactions=1)
+
+
+def store_medicine(name, fda_data, interactions, degraded=()):
+    """
+    Upsert a fresh lookup into `medicines` as a slim summary (the full label
+    goes to `label_blobs`); racing requests leave one document. Returns the
+    summary, or None when neither upstream had anything. A lookup with a
+    failed or timed-out side (`degraded`) is returned but not stored, since
+    `medicines` never expires and would keep serving the gap.
+    """
+    if not (fda_data or interactions):
+        return None
+    doc = label_to_medicine(fda_data, interactions, name=name)
+    if degraded:
+        current_app.logger.info(f"Not storing partial lookup for '{name}' ({', '.join(degraded)} unavailable)")
+        return doc
+    ensure_search_indexes(mongo.db.medicines)
+    if fda_data:
+        store_label_blobs(mongo.db, [fda_data])
+    try:
+        mongo.db.medicines.update_one({"name": name}, {"$setOnInsert": doc}, upsert=True)
+    except DuplicateKeyError:
+        pass  # another request stored it first
+    suggest_index.add_document(doc)
+    _index_interactions(name)
+    return doc
+
+
+def _index_interactions(name):
+    # Grow the pair index with this drug (its RxNorm lookups are cached by now)
+    try:
+        interaction_index.refresh(get_rxcui(name))
+    except Exception as e:
+        current_app.logger.warning(f"Interaction index refresh failed for '{name}': {e}")
+
+
+def complete_interactions(doc):
+    """
+    Labels seeded from openFDA are stored without RxNorm interactions
+    (the field is unset, not empty); look them up the first time such a
+    document is served and store them. Returns the degraded sides.
+    """
+    if doc.get("interactions") is not None:
+        return []
+    interactions, degraded = fetch_interactions(doc["name"])
+    doc["interactions"] = interactions
+    if degraded:
+        return degraded
+    mongo.db.medicines.update_one({"name": doc["name"]}, {"$set": {"interactions": interactions}})
+    _index_interactions(doc["name"])
+    return []
+
 @medicine_bp.route('/search', methods=["GET"])
 def search():
-    query = request.args.get("query", "").strip().lower()
+    query = normalize_drug_name(request.args.get("query", ""))
     if not query:
         return render_template("search_results.html", error="Please enter a drug name.")
 
     # Try to find in MongoDB first
-    cached = mongo.db.medicines.find_one({"name": query})
+    cached = mongo.db.medicines.find_one({"name": query}, MEDICINE_PROJECTION)
     if cached:
         current_app.logger.info("Using cached result from MongoDB.")
-        return render_template("search_results.html", fda=cached["fda"], interactions=cached["interactions"])
+        suggest_index.bump(query)
+        degraded = complete_interactions(cached)
+        return render_template("search_results.html", results=[to_result(cached)], query=query,
+                               interactions=cached["interactions"], degraded=degraded)
 
-    # Fetch from APIs
-    fda_data = get_fda_data(query)
-    rxcui = get_rxcui(query)
-    interactions = get_interactions(rxcui)
+    # Fetch from APIs (FDA and RxNorm run concurrently)
+    fda_data, interactions, degraded = fetch_medicine_info(query)
 
     # Save to DB if successful
-    if fda_data or interactions:
-        mongo.db.medicines.insert_one({
-            "name": query,
-            "fda": fda_data,
-            "interactions": interactions
-        })
+    doc = store_medicine(query, fda_data, interactions, degraded)
+
+    return render_template("search_results.html", results=[to_result(doc)] if doc else [], query=query,
+                           interactions=interactions, degraded=degraded)
+
+
+# ✅ Typeahead: answered from the in-memory name index, no database round trip
+@medicine_bp.route('/suggest', methods=["GET"])
+def suggest():
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", 10, type=int)
+    suggest_index.maybe_refresh()
+    return jsonify(query=query, suggestions=suggest_index.suggest(query, limit))
+
+
+# ✅ Detail view: the only place the full (compressed) label is loaded
+@medicine_bp.route('/label/<path:name>', methods=["GET"])
+def label_detail(name):
+    name = normalize_drug_name(name)
+    doc = mongo.db.medicines.find_one({"name": name}, {"_id": 0, "name": 1, "label_id": 1, "fda": 1})
+    if not doc:
+        return render_template("label.html", name=name, label=None), 404
+    full_label = doc.get("fda") or load_label(mongo.db, doc.get("label_id"))
+    sections = []
+    for field, value in (full_label or {}).items():
+        if isinstance(value, list) and value and all(isinstance(v, str) for v in value):
+            sections.append((field.replace("_", " ").capitalize(), value))
+    return render_template("label.html", name=name, label=full_label, sections=sections)
+
+
+def _requested_drugs():
+    """
+    Drug names/RxCUIs from a JSON body {"drugs": [...]} or ?drugs=a,b&drugs=c;
+    None for a JSON body of any other shape.
+    """
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        drugs = payload.get("drugs") if isinstance(payload, dict) else None
+        if isinstance(drugs, str):
+            drugs = [drugs]
+        if not isinstance(drugs, list):
+            return None
+    else:
+        drugs = [part for value in request.values.getlist("drugs") for part in value.split(",")]
+    return [str(d).strip() for d in drugs if str(d).strip()]
+
+
+@medicine_bp.route('/interactions', methods=["GET", "POST"])
+def interactions():
+    drugs = _requested_drugs()
+    if drugs is None:
+        return jsonify(error='Send a JSON body like {"drugs": ["warfarin", "aspirin"]}.'), 400
+    if len(drugs) < 2:
+        return jsonify(error="Provide at least two drug names or RxCUIs."), 400
+    if len(drugs) > MAX_INTERACTION_DRUGS:
+        return jsonify(error=f"At most {MAX_INTERACTION_DRUGS} drugs per request."), 400
+
+    # Numeric entries are RxCUIs already; names resolve concurrently (and cached)
+    names = [normalize_drug_name(d) for d in drugs if not d.isdigit()]
+    resolved = map_concurrent(_lookup_rxcui, names, failed=_UNAVAILABLE)
+    resolved_drugs = []
+    unresolved = []
+    unchecked = []
+    for drug in drugs:
+        rxcui = drug if drug.isdigit() else resolved.get(normalize_drug_name(drug))
+        if rxcui is _UNAVAILABLE:
+            unchecked.append(drug)  # RxNorm failed, which is not the same as "no such drug"
+        elif rxcui:
+            resolved_drugs.append({"input": drug, "rxcui": rxcui})
+        else:
+            unresolved.append(drug)
+
+    # Fetch only drugs the index has never seen, then answer from memory
+    rxcuis = [d["rxcui"] for d in resolved_drugs]
+    missing = [r for r in dict.fromkeys(rxcuis) if not interaction_index.is_indexed(r)]
+    if missing:
+        map_concurrent(interaction_index.refresh, missing)
+    # A failed or timed-out fetch leaves its drug unindexed: report it rather
+    # than let its interactions silently drop out of the answer
+    unchecked += [d["input"] for d in resolved_drugs if not interaction_index.is_indexed(d["rxcui"])]
+    found = interaction_index.check(rxcuis)
+
+    response = dict(
+        drugs=resolved_drugs,
+        unresolved=unresolved,
+        interactions=[
+            {k: doc.get(k) for k in ("rxcui_a", "name_a", "rxcui_b", "name_b", "severity", "description")}
+            for doc in found
+        ],
+    )
+    if unchecked:
+        response["unchecked"] = unchecked
+    return jsonify(response)
+
+
+def _batch_line(name, inputs, source, doc, degraded=()):
+    line = {"name": name, "inputs": inputs, "source": source, "found": bool(doc)}
+    if degraded:
+        line["degraded"] = list(degraded)
+    if doc:
+        line["result"] = dict(to_result(doc), interactions=doc.get("interactions") or [])
+    return json.dumps(line, default=str) + "\n"
+
+
+def _lookup_upstream(app, name):
+    fda_data, interactions, degraded = fetch_medicine_info(name)
+    with app.app_context():
+        return store_medicine(name, fda_data, interactions, degraded), degraded
+
+
+def _complete_cached(app, doc):
+    with app.app_context():
+        return doc, complete_interactions(doc)
+
+
+@medicine_bp.route('/batch', methods=["POST"])
+def batch():
+    payload = request.get_json(silent=True)
+    names = payload.get("names") if isinstance(payload, dict) else None
+    if not isinstance(names, list) or not names:
+        return jsonify(error='Send a JSON body like {"names": ["aspirin", "ibuprofen"]}.'), 400
+
+    # Normalize and de-duplicate, remembering which inputs map to each name
+    inputs_by_name = {}
+    for raw in names:
+        name = normalize_drug_name(str(raw))
+        if name:
+            inputs_by_name.setdefault(name, []).append(raw)
+    if len(inputs_by_name) > MAX_BATCH_NAMES:
+        return jsonify(error=f"At most {MAX_BATCH_NAMES} distinct names per request."), 400
+
+    app = current_app._get_current_object()
+
+    def generate():
+        # One $in round trip answers everything already stored
+        cached = mongo.db.medicines.find({"name": {"$in": list(inputs_by_name)}}, MEDICINE_PROJECTION)
+        pending = dict(inputs_by_name)
+        queue = []
+        for doc in cached:
+            name = doc["name"]
+            if name not in pending:
+                continue
+            if doc.get("interactions") is None:
+                # Seeded label: still needs its RxNorm side, so it joins the upstream queue
+                queue.append((name, "cache", _complete_cached, doc))
+            else:
+                yield _batch_line(name, pending.pop(name), "cache", doc)
+        queued = {name for name, *_ in queue}
+        queue += [(name, "upstream", _lookup_upstream, name) for name in pending if name not in queued]
 
-    return render_template("search_results.html", fda=fda_data, interactions=interactions)
+        # The rest go upstream a few at a time, streamed back in completion order
+        with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix="batch") as pool:
+            in_flight = {}
+            while queue or in_flight:
+                while queue and len(in_flight) < BATCH_CONCURRENCY:
+                    name, source, lookup, arg = queue.pop(0)
+                    in_flight[pool.submit(lookup, app, arg)] = (name, source)
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, source = in_flight.pop(future)
+                    try:
+                        doc, degraded = future.result()
+                    except Exception as e:
+                        app.logger.warning(f"Batch lookup failed for '{name}': {e}")
+                        doc, degraded = None, ()
+                    yield _batch_line(name, pending[name], source, doc, degraded)
 
+    return Response(generate(), mimetype="application/x-ndjson")
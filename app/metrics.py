@@ -0,0 +1,209 @@
+# metrics.py
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from flask import Blueprint, Response, g, request
+from jinja2 import Template
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-request span totals; worker threads see it through copied contexts
+_current_spans = ContextVar("request_spans", default=None)
+
+
+# ✅ Minimal Prometheus-style metric types
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            index = bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                series["buckets"][index] += 1
+            series["sum"] += seconds
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = _labels(zip(self.label_names, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{labels}le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{labels.rstrip(',')}}} {series['sum']}")
+                lines.append(f"{self.name}_count{{{labels.rstrip(',')}}} {series['count']}")
+        return lines
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs):
+    return "".join(f'{name}="{_escape(value)}",' for name, value in pairs)
+
+
+request_latency = Histogram("medinfo_http_request_duration_seconds",
+                            "Time spent serving HTTP requests.", ("method", "route", "status"))
+upstream_latency = Histogram("medinfo_upstream_request_duration_seconds",
+                             "Time spent in upstream HTTP calls.", ("upstream", "outcome"))
+mongo_latency = Histogram("medinfo_mongo_command_duration_seconds",
+                          "Time spent in MongoDB commands.", ("command", "outcome"))
+template_latency = Histogram("medinfo_template_render_duration_seconds",
+                             "Time spent rendering Jinja templates.", ("template",))
+HISTOGRAMS = (request_latency, upstream_latency, mongo_latency, template_latency)
+
+
+# ✅ Request spans
+class RequestSpans:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.totals = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, kind, seconds):
+        with self._lock:
+            self.totals[kind] = self.totals.get(kind, 0.0) + seconds
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def summary(self):
+        with self._lock:
+            return ", ".join(f"{kind}={self.totals[kind] * 1000:.1f}ms/{self.counts[kind]}"
+                             for kind in sorted(self.totals))
+
+
+def _record(kind, seconds):
+    spans = _current_spans.get()
+    if spans is not None:
+        spans.add(kind, seconds)
+
+
+def observe_upstream(upstream, seconds, ok=True):
+    upstream_latency.observe(seconds, upstream=upstream, outcome="ok" if ok else "error")
+    _record("upstream", seconds)
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """Times every command through pymongo command monitoring."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._observe(event, "ok")
+
+    def failed(self, event):
+        self._observe(event, "error")
+
+    def _observe(self, event, outcome):
+        seconds = event.duration_micros / 1e6
+        mongo_latency.observe(seconds, command=event.command_name, outcome=outcome)
+        _record("mongo", seconds)
+
+
+class TimedTemplate(Template):
+    def render(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - started
+            template_latency.observe(seconds, template=self.name or "<string>")
+            _record("template", seconds)
+
+
+_listener_registered = False
+
+
+def register_mongo_listener():
+    """Register once, before any MongoClient is created, so every client reports."""
+    global _listener_registered
+    if not _listener_registered:
+        monitoring.register(MongoCommandTimer())
+        _listener_registered = True
+
+
+# ✅ Prometheus text endpoint
+metrics_bp = Blueprint("metrics", __name__)
+
+
+def render_metrics():
+    from app.utils.cache import cache_stats
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    lines += ["# HELP medinfo_cache_events_total Lookup cache hits, misses and coalesced calls.",
+              "# TYPE medinfo_cache_events_total counter"]
+    for cache, stats in sorted(cache_stats().items()):
+        for event in ("memory_hits", "mongo_hits", "misses", "coalesced", "negative_stores", "errors"):
+            lines.append(f'medinfo_cache_events_total{{cache="{cache}",event="{event}"}} {stats[event]}')
+    lines += ["# HELP medinfo_cache_memory_entries Entries held in the in-process cache tier.",
+              "# TYPE medinfo_cache_memory_entries gauge"]
+    for cache, stats in sorted(cache_stats().items()):
+        lines.append(f'medinfo_cache_memory_entries{{cache="{cache}"}} {stats["memory_size"]}')
+    return "\n".join(lines) + "\n"
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+def init_metrics(app):
+    """Hook request timing, template timing and the /metrics endpoint into the app."""
+    app.config.setdefault("SLOW_REQUEST_MS", float(os.getenv("SLOW_REQUEST_MS", "500")))
+    app.jinja_env.template_class = TimedTemplate
+
+    @app.before_request
+    def start_spans():
+        g.spans = RequestSpans()
+        g.spans_token = _current_spans.set(g.spans)
+
+    def finish(spans, method, route, path, status):
+        seconds = time.perf_counter() - spans.started
+        request_latency.observe(seconds, method=method, route=route, status=status)
+        if seconds * 1000 >= app.config["SLOW_REQUEST_MS"]:
+            app.logger.warning(f"Slow request: {method} {path} {status} took {seconds * 1000:.1f}ms "
+                               f"({spans.summary() or 'no spans'})")
+
+    @app.after_request
+    def observe_request(response):
+        spans = g.get("spans")
+        if spans is None:
+            return response
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        args = (spans, request.method, route, request.full_path.rstrip("?"), response.status_code)
+        if response.is_streamed:
+            # A streamed body (e.g. /medicine/batch NDJSON) is generated after this
+            # hook; time it when the server closes the response instead
+            response.call_on_close(lambda: finish(*args))
+        else:
+            finish(*args)
+        return response
+
+    @app.teardown_request
+    def clear_spans(exc):
+        token = g.pop("spans_token", None)
+        if token is not None:
+            _current_spans.reset(token)
+
+    app.register_blueprint(metrics_bp)
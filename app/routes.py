@@ -3,6 +3,7 @@ from . import mongo, bcrypt
 from flask_login import login_user, logout_user, login_required, current_user
 from .models import User
 from bson.objectid import ObjectId
+from .utils.search import search_medicines
 
 # ✅ DEFINE BLUEPRINT
 main = Blueprint('main', __name__)
@@ -45,7 +46,8 @@ def dashboard():
     if request.method == 'POST':
         searched = True
         query = request.form['medicine']
-        medicine = mongo.db.medicines.find_one({"name": {"$regex": query, "$options": "i"}})
+        results, _ = search_medicines(mongo.db.medicines, query, limit=1)
+        medicine = results[0] if results else None
     return render_template('dashboard.html', user=current_user, medicine=medicine, searched=searched)
 
 # ✅ LOGOUT
@@ -60,12 +62,13 @@ def logout():
 @login_required
 def search():
     results = []
-    query = ''
-    if request.method == 'POST':
-        query = request.form.get('query', '').strip()
+    next_cursor = None
+    # POST comes from the dashboard form, GET from the "More results" link
+    query = (request.form.get('query') or request.args.get('query') or '').strip()
+    if request.method == 'POST' or query:
         if query:
-            results = list(mongo.db.medicines.find({
-                "name": {"$regex": query, "$options": "i"}
-            }))
-        return render_template('search_results.html', results=results, query=query)
+            results, next_cursor = search_medicines(
+                mongo.db.medicines, query, cursor=request.args.get('cursor'))
+        return render_template('search_results.html', results=results, query=query,
+                               next_cursor=next_cursor)
     return redirect(url_for('main.dashboard'))
@@ -1,68 +1,252 @@
 # utils/api_clients.py
 
+import contextvars
+import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
-from app.db import drug_collection  # Make sure db.py is in app/
+from app.db import get_drug_collection, mongo
+from app.utils.cache import TieredCache
+from app.utils.helpers import normalize_drug_name
+from app.metrics import observe_upstream
+from app.utils.labels import label_to_drug, store_label_blobs
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables (e.g. from .env in local or Replit secrets)
 load_dotenv()
 FDA_API_KEY = os.getenv("FDA_API_KEY")
 
+FDA_BASE_URL = os.getenv("FDA_BASE_URL", "https://api.fda.gov")
+RXNAV_BASE_URL = os.getenv("RXNAV_BASE_URL", "https://rxnav.nlm.nih.gov")
+
+# (connect, read) timeout in seconds for every upstream call
+UPSTREAM_TIMEOUT = (
+    float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3")),
+    float(os.getenv("UPSTREAM_READ_TIMEOUT", "5")),
+)
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "2"))
+# Overall budget for one medicine lookup, after which the slower side is dropped
+LOOKUP_DEADLINE = float(os.getenv("UPSTREAM_LOOKUP_DEADLINE", "8"))
+UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", "20"))
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL = int(os.getenv("CACHE_TTL", str(24 * 3600)))
+CACHE_NEGATIVE_TTL = int(os.getenv("CACHE_NEGATIVE_TTL", "600"))
+
+
+def _cache(name):
+    return TieredCache(
+        name,
+        maxsize=CACHE_MAX_ENTRIES,
+        ttl=CACHE_TTL,
+        negative_ttl=CACHE_NEGATIVE_TTL,
+        mongo_collection=lambda: mongo.db["api_cache"],
+    )
+
+
+fda_cache = _cache("fda")
+rxcui_cache = _cache("rxcui")
+interactions_cache = _cache("interaction_pairs")
+
+
+# ✅ Shared keep-alive session with a connection pool and bounded retries
+def _build_session():
+    retry = Retry(
+        total=UPSTREAM_RETRIES,
+        backoff_factor=0.2,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=UPSTREAM_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+session = _build_session()
+_executor = ThreadPoolExecutor(max_workers=UPSTREAM_POOL_SIZE, thread_name_prefix="upstream")
+
+
+def _submit(fn, *args):
+    # Copy the caller's context so upstream timings land in its request spans
+    return _executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _get_json(url, params=None, upstream="upstream"):
+    started = time.perf_counter()
+    ok = False
+    try:
+        response = session.get(url, params=params, timeout=UPSTREAM_TIMEOUT)
+        ok = response.status_code < 500
+        response.raise_for_status()
+        return response.json()
+    finally:
+        observe_upstream(upstream, time.perf_counter() - started, ok)
+
+
+def _fetch_fda_data(drug_name):
+    url = f"{FDA_BASE_URL}/drug/label.json"
+    params = {"search": f"generic_name:{drug_name}"}
+    if FDA_API_KEY:
+        params["api_key"] = FDA_API_KEY
+    try:
+        data = _get_json(url, params, "openfda")
+    except requests.HTTPError as e:
+        # openFDA answers 404 when nothing matches the search
+        if e.response is not None and e.response.status_code == 404:
+            return {}
+        raise
+    return data.get("results", [])[0] if data.get("results") else {}
+
+
+def _fetch_rxcui(drug_name):
+    url = f"{RXNAV_BASE_URL}/REST/rxcui.json"
+    data = _get_json(url, {"name": drug_name}, "rxnorm")
+    return data.get("idGroup", {}).get("rxnormId", [None])[0]
+
+
+def _fetch_interaction_pairs(rxcui):
+    url = f"{RXNAV_BASE_URL}/REST/interaction/interaction.json"
+    data = _get_json(url, {"rxcui": rxcui}, "rxnorm_interactions")
+    interaction_groups = data.get("interactionTypeGroup", [])
+    pairs = []
+    for group in interaction_groups:
+        for interaction_type in group.get("interactionType", []):
+            for interaction in interaction_type.get("interactionPair", []):
+                concepts = [c.get("minConceptItem", {}) for c in interaction.get("interactionConcept", [])]
+                pair = {"description": interaction.get("description"), "severity": interaction.get("severity")}
+                if len(concepts) == 2:
+                    pair["concepts"] = [{"rxcui": c.get("rxcui"), "name": c.get("name")} for c in concepts]
+                pairs.append(pair)
+    return pairs
+
+
+# Cached lookups that raise on upstream errors, so callers can tell "no data" from "failed"
+def _lookup_fda_data(drug_name):
+    drug_name = normalize_drug_name(drug_name)
+    return fda_cache.get_or_fetch(drug_name, lambda: _fetch_fda_data(drug_name))
+
+
+def _lookup_rxcui(drug_name):
+    drug_name = normalize_drug_name(drug_name)
+    return rxcui_cache.get_or_fetch(drug_name, lambda: _fetch_rxcui(drug_name))
+
+
+def _lookup_interaction_pairs(rxcui):
+    if not rxcui:
+        return []
+    return interactions_cache.get_or_fetch(rxcui, lambda: _fetch_interaction_pairs(rxcui))
+
+
 # ✅ Fetch drug label data from the FDA API
 def get_fda_data(drug_name):
-    url = f"https://api.fda.gov/drug/label.json?search=generic_name:{drug_name}&api_key={FDA_API_KEY}"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        return data.get("results", [])[0] if data.get("results") else {}
+        return _lookup_fda_data(drug_name)
     except Exception as e:
-        print(f"FDA API error: {e}")
+        logger.warning(f"FDA API error: {e}")
         return {}
 
 # ✅ Insert FDA drug data into MongoDB
 def store_fda_data_in_mongo(drug_name):
     drug_data = get_fda_data(drug_name)
     if drug_data:
+        drug_collection = get_drug_collection()
         drug_id = drug_data.get("id")
-        if not drug_collection.find_one({"id": drug_id}):
-            drug_collection.insert_one(drug_data)
-            print(f"✅ Inserted drug data for '{drug_name}' with ID {drug_id}")
+        if not drug_collection.find_one({"id": drug_id}, {"_id": 1}):
+            drug_collection.insert_one(label_to_drug(drug_data))
+            store_label_blobs(drug_collection.database, [drug_data])
+            logger.info(f"Inserted drug data for '{drug_name}' with ID {drug_id}")
         else:
-            print(f"⚠️ Drug '{drug_name}' already exists in database.")
+            logger.info(f"Drug '{drug_name}' already exists in database.")
     else:
-        print(f"❌ No FDA data found for '{drug_name}'")
+        logger.info(f"No FDA data found for '{drug_name}'")
 
 # ✅ Get the RxNorm Concept Unique Identifier (RxCUI) from drug name
 def get_rxcui(drug_name):
-    url = f"https://rxnav.nlm.nih.gov/REST/rxcui.json?name={drug_name}"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        return data.get("idGroup", {}).get("rxnormId", [None])[0]
+        return _lookup_rxcui(drug_name)
     except Exception as e:
-        print(f"RxNorm API error: {e}")
+        logger.warning(f"RxNorm API error: {e}")
         return None
 
-# ✅ Get drug interactions using the RxCUI
-def get_interactions(rxcui):
-    if not rxcui:
-        return []
-    url = f"https://rxnav.nlm.nih.gov/REST/interaction/interaction.json?rxcui={rxcui}"
+# ✅ Get structured interaction pairs (both concepts, severity, description) for an RxCUI
+def get_interaction_pairs(rxcui):
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        interaction_groups = data.get("interactionTypeGroup", [])
-        interactions = []
-        for group in interaction_groups:
-            for interaction_type in group.get("interactionType", []):
-                for interaction in interaction_type.get("interactionPair", []):
-                    interactions.append(interaction.get("description"))
-        return interactions
+        return _lookup_interaction_pairs(rxcui)
     except Exception as e:
-        print(f"Interaction API error: {e}")
+        logger.warning(f"Interaction API error: {e}")
         return []
 
+# ✅ Get drug interactions using the RxCUI
+def get_interactions(rxcui):
+    return [pair.get("description") for pair in get_interaction_pairs(rxcui)]
+
+
+def _get_rxnorm_interactions(drug_name):
+    return [pair.get("description") for pair in _lookup_interaction_pairs(_lookup_rxcui(drug_name))]
+
+
+def _gather(drug_name, futures, deadline):
+    """Wait up to `deadline` for each side; returns (results, degraded sides)."""
+    deadline = LOOKUP_DEADLINE if deadline is None else deadline
+    wait(futures.values(), timeout=deadline)
+
+    results, degraded = {}, []
+    for side, future in futures.items():
+        if not future.done():
+            logger.warning(f"{side} lookup timed out for '{drug_name}'")
+            degraded.append(side)
+        elif future.exception() is not None:
+            logger.warning(f"{side} lookup failed for '{drug_name}': {future.exception()}")
+            degraded.append(side)
+        else:
+            results[side] = future.result()
+    return results, degraded
+
+
+# ✅ Run the FDA label fetch alongside the RxCUI -> interactions chain
+def fetch_medicine_info(drug_name, deadline=None):
+    """
+    Look up FDA label data and RxNorm interactions for a drug concurrently.
+    Returns (fda_data, interactions, degraded). A side that errors or misses
+    the deadline comes back empty and is named in `degraded` ("fda" or
+    "rxnorm"), so callers can render the other side without mistaking the
+    gap for "no data".
+    """
+    results, degraded = _gather(drug_name, {
+        "fda": _submit(_lookup_fda_data, drug_name),
+        "rxnorm": _submit(_get_rxnorm_interactions, drug_name),
+    }, deadline)
+    return results.get("fda") or {}, results.get("rxnorm") or [], degraded
+
+
+def fetch_interactions(drug_name, deadline=None):
+    """The RxNorm side of fetch_medicine_info alone: (interactions, degraded)."""
+    results, degraded = _gather(drug_name, {"rxnorm": _submit(_get_rxnorm_interactions, drug_name)}, deadline)
+    return results.get("rxnorm") or [], degraded
+
+
+# ✅ Fan a lookup out over the shared upstream pool
+def map_concurrent(fn, items, deadline=None, failed=None):
+    """
+    Return {item: fn(item)} for the distinct items, run in parallel.
+    Items whose call raises or misses the deadline map to `failed`.
+    """
+    deadline = LOOKUP_DEADLINE if deadline is None else deadline
+    futures = {item: _submit(fn, item) for item in dict.fromkeys(items)}
+    wait(futures.values(), timeout=deadline)
+    results = {}
+    for item, future in futures.items():
+        if future.done() and future.exception() is None:
+            results[item] = future.result()
+        else:
+            logger.warning(f"Lookup failed or timed out for '{item}'")
+            results[item] = failed
+    return results
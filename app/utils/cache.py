@@ -0,0 +1,199 @@
+# utils/cache.py
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+# Every TieredCache registers itself here so counters can be reported together
+_registry = {}
+
+
+def cache_stats():
+    """Return hit/miss counters for every registered cache."""
+    return {name: cache.stats() for name, cache in _registry.items()}
+
+
+# ✅ Bounded in-process LRU tier with per-entry expiry
+class LRUCache:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (found, value); expired entries count as not found."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# ✅ Mongo tier: one document per key, expired by a TTL index
+class MongoCacheTier:
+    def __init__(self, get_collection):
+        # Resolved lazily so importing this module never touches the database
+        self._get_collection = get_collection
+        self._indexed = False
+
+    @property
+    def collection(self):
+        return self._get_collection()
+
+    def ensure_indexes(self):
+        if self._indexed:
+            return
+        self.collection.create_index("key", unique=True)
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+        self._indexed = True
+
+    def get(self, key):
+        self.ensure_indexes()
+        doc = self.collection.find_one({"key": key}, {"_id": 0, "value": 1, "expires_at": 1})
+        if not doc:
+            return False, None
+        # The TTL monitor only runs once a minute, so check expiry on read too
+        expires_at = doc["expires_at"]
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at <= datetime.now(timezone.utc):
+            return False, None
+        return True, doc.get("value")
+
+    def set(self, key, value, ttl):
+        self.ensure_indexes()
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        self.collection.update_one(
+            {"key": key},
+            {"$set": {"value": value, "expires_at": expires_at}},
+            upsert=True,
+        )
+
+
+# ✅ Collapse concurrent calls for the same key into one execution
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Run fn() once per key at a time; returns (value, shared)."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            return future.result(), True
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return future.result(), False
+
+
+# ✅ Memory -> Mongo -> upstream lookup with negative caching and coalescing
+class TieredCache:
+    def __init__(self, name, maxsize=1024, ttl=3600, negative_ttl=300,
+                 mongo_collection=None, is_negative=lambda value: not value):
+        self.name = name
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.is_negative = is_negative
+        self.memory = LRUCache(maxsize)
+        self.mongo = MongoCacheTier(mongo_collection) if mongo_collection else None
+        self._flight = SingleFlight()
+        self._counters = {"memory_hits": 0, "mongo_hits": 0, "misses": 0,
+                          "coalesced": 0, "negative_stores": 0, "errors": 0}
+        self._counter_lock = threading.Lock()
+        _registry[name] = self
+
+    def _count(self, counter):
+        with self._counter_lock:
+            self._counters[counter] += 1
+
+    def stats(self):
+        with self._counter_lock:
+            stats = dict(self._counters)
+        stats["memory_size"] = len(self.memory)
+        return stats
+
+    def _key(self, key):
+        return f"{self.name}:{key}"
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Return the cached value for key, calling fetch() on a miss.
+        Exceptions from fetch() propagate and are never cached.
+        """
+        found, value = self.memory.get(key)
+        if found:
+            self._count("memory_hits")
+            return value
+
+        value, shared = self._flight.do(key, lambda: self._load(key, fetch))
+        if shared:
+            self._count("coalesced")
+        return value
+
+    def _load(self, key, fetch):
+        if self.mongo is not None:
+            try:
+                found, value = self.mongo.get(self._key(key))
+            except Exception as e:
+                self._count("errors")
+                logger.warning(f"Cache read error ({self.name}): {e}")
+                found = False
+            if found:
+                self._count("mongo_hits")
+                self.memory.set(key, value, self._ttl_for(value))
+                return value
+
+        self._count("misses")
+        value = fetch()
+        ttl = self._ttl_for(value)
+        if self.is_negative(value):
+            self._count("negative_stores")
+        self.memory.set(key, value, ttl)
+        if self.mongo is not None:
+            try:
+                self.mongo.set(self._key(key), value, ttl)
+            except Exception as e:
+                self._count("errors")
+                logger.warning(f"Cache write error ({self.name}): {e}")
+        return value
+
+    def _ttl_for(self, value):
+        return self.negative_ttl if self.is_negative(value) else self.ttl
+
+    def clear(self):
+        self.memory.clear()
@@ -13,3 +13,7 @@ def is_strong_password(password):
     At least 6 characters long.
     """
     return len(password) >= 6
+
+def normalize_drug_name(name):
+    """Lower-case and collapse whitespace so lookups share one cache key."""
+    return " ".join((name or "").split()).lower()
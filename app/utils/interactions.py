@@ -0,0 +1,131 @@
+# utils/interactions.py
+
+import threading
+from datetime import datetime, timezone
+from pymongo import ASCENDING, UpdateOne
+from app.utils.api_clients import _lookup_interaction_pairs
+
+# RxNav reports "high" or "N/A"; anything unknown ranks lowest
+SEVERITY_RANK = {"high": 3, "moderate": 2, "low": 1}
+
+
+def _rank(severity):
+    return SEVERITY_RANK.get((severity or "").lower(), 0)
+
+
+def pair_key(rxcui_a, rxcui_b):
+    """Order a pair so (a, b) and (b, a) share one index entry."""
+    a, b = str(rxcui_a), str(rxcui_b)
+    return (a, b) if a <= b else (b, a)
+
+
+def normalize_pairs(raw_pairs):
+    """Turn RxNav interactionPair records into pair-index documents, one per (a, b)."""
+    pairs = {}
+    for raw in raw_pairs:
+        concepts = raw.get("concepts") or []
+        if len(concepts) != 2 or not all(c.get("rxcui") for c in concepts):
+            continue
+        first, second = concepts
+        key = pair_key(first["rxcui"], second["rxcui"])
+        names = {first["rxcui"]: first.get("name"), second["rxcui"]: second.get("name")}
+        doc = {
+            "rxcui_a": key[0],
+            "rxcui_b": key[1],
+            "name_a": names.get(key[0]),
+            "name_b": names.get(key[1]),
+            "severity": raw.get("severity"),
+            "description": raw.get("description"),
+        }
+        # Several sources can describe the same pair; keep the most severe
+        current = pairs.get(key)
+        if current is None or _rank(doc["severity"]) > _rank(current["severity"]):
+            pairs[key] = doc
+    return list(pairs.values())
+
+
+# ✅ Pair index in Mongo with an in-memory adjacency map in front of it
+class InteractionIndex:
+    def __init__(self, get_db):
+        # Resolved lazily: the app's Mongo client only exists after create_app()
+        self._get_db = get_db
+        self._lock = threading.RLock()
+        self._adjacency = {}
+        self._indexed = set()  # RxCUIs whose interactions have been fetched
+        self._loaded = False
+
+    @property
+    def pairs(self):
+        return self._get_db().interaction_pairs
+
+    @property
+    def sources(self):
+        return self._get_db().interaction_sources
+
+    def ensure_indexes(self):
+        self.pairs.create_index([("rxcui_a", ASCENDING), ("rxcui_b", ASCENDING)], unique=True)
+        self.pairs.create_index("rxcui_b")
+        self.sources.create_index("rxcui", unique=True)
+
+    def load(self):
+        """Build the adjacency map from Mongo once per process."""
+        with self._lock:
+            if self._loaded:
+                return
+            self.ensure_indexes()
+            for doc in self.pairs.find({}, {"_id": 0}):
+                self._link(doc)
+            self._indexed.update(doc["rxcui"] for doc in self.sources.find({}, {"_id": 0, "rxcui": 1}))
+            self._loaded = True
+
+    def _link(self, doc):
+        a, b = doc["rxcui_a"], doc["rxcui_b"]
+        self._adjacency.setdefault(a, {})[b] = doc
+        self._adjacency.setdefault(b, {})[a] = doc
+
+    def is_indexed(self, rxcui):
+        self.load()
+        return str(rxcui) in self._indexed
+
+    def add(self, rxcui, raw_pairs):
+        """Record the interactions fetched for one RxCUI in Mongo and in memory."""
+        self.load()
+        docs = normalize_pairs(raw_pairs)
+        if docs:
+            self.pairs.bulk_write([
+                UpdateOne({"rxcui_a": d["rxcui_a"], "rxcui_b": d["rxcui_b"]}, {"$set": d}, upsert=True)
+                for d in docs
+            ], ordered=False)
+        self.sources.update_one(
+            {"rxcui": str(rxcui)},
+            {"$set": {"rxcui": str(rxcui), "pairs": len(docs), "indexed_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+        with self._lock:
+            for doc in docs:
+                self._link(doc)
+            self._indexed.add(str(rxcui))
+        return len(docs)
+
+    def refresh(self, rxcui):
+        """
+        Fetch and index a drug's interactions unless that already happened.
+        An upstream failure raises and leaves the drug unindexed; a drug
+        RxNav knows no interactions for is indexed with none.
+        """
+        if not rxcui or self.is_indexed(rxcui):
+            return
+        self.add(rxcui, _lookup_interaction_pairs(rxcui))
+
+    def check(self, rxcuis):
+        """Every indexed interaction between any two of the given RxCUIs."""
+        self.load()
+        wanted = {str(r) for r in rxcuis if r}
+        found = []
+        with self._lock:
+            for a in wanted:
+                for b, doc in self._adjacency.get(a, {}).items():
+                    if a < b and b in wanted:
+                        found.append(doc)
+        found.sort(key=lambda d: (-_rank(d["severity"]), d["rxcui_a"], d["rxcui_b"]))
+        return found
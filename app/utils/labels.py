@@ -0,0 +1,107 @@
+# utils/labels.py
+
+import json
+import zlib
+from bson.binary import Binary
+from pymongo import ReplaceOne
+from app.utils.helpers import normalize_drug_name
+
+# Summary text is what the result lists show; the full text lives in the blob
+SUMMARY_TEXT_LIMIT = 1500
+BLOB_COLLECTION = "label_blobs"
+
+
+def label_names(label):
+    """Normalized generic and brand names listed in a label's openfda block."""
+    openfda = label.get("openfda") or {}
+    names = []
+    for field in ("generic_name", "brand_name"):
+        for name in openfda.get(field) or []:
+            name = normalize_drug_name(name)
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def medicine_name(label):
+    """The key a label is stored under in `medicines` (generic name first, like /medicine/search)."""
+    names = label_names(label)
+    return names[0] if names else None
+
+
+def _text(label, field):
+    value = label.get(field)
+    if isinstance(value, list):
+        value = " ".join(v for v in value if isinstance(v, str))
+    if not value:
+        return None
+    value = value.strip()
+    if len(value) > SUMMARY_TEXT_LIMIT:
+        value = value[:SUMMARY_TEXT_LIMIT].rsplit(" ", 1)[0] + "…"
+    return value
+
+
+def label_summary(label):
+    """The small, typed part of a label that list views and search need."""
+    openfda = label.get("openfda") or {}
+    return {
+        "label_id": label.get("id"),
+        "generic_names": [normalize_drug_name(n) for n in openfda.get("generic_name") or []],
+        "brand_names": [normalize_drug_name(n) for n in openfda.get("brand_name") or []],
+        # Active ingredients; the typeahead offers them as synonyms
+        "substance_names": [normalize_drug_name(n) for n in openfda.get("substance_name") or []],
+        "indications": _text(label, "indications_and_usage"),
+        "dosage": {"adult": _text(label, "dosage_and_administration")},
+        "contraindications": _text(label, "contraindications"),
+    }
+
+
+def label_to_medicine(label, interactions=None, name=None):
+    """
+    Shape a raw openFDA label into a slim `medicines` document. Without
+    `interactions` (labels seeded from openFDA) the field is left unset, so
+    readers know RxNorm was never asked rather than that it found nothing.
+    """
+    name = name or medicine_name(label)
+    if not name:
+        return None
+    doc = {"name": name}
+    if interactions is not None:
+        doc["interactions"] = interactions
+    if label:
+        doc.update(label_summary(label))
+    return doc
+
+
+def label_to_drug(label):
+    """Shape a raw openFDA label into a slim `drugs` document keyed by label id."""
+    return dict(label_summary(label), id=label.get("id"), name=medicine_name(label))
+
+
+# ✅ Full labels are stored zlib-compressed, keyed by label id, and read only on demand
+def compress_label(label):
+    raw = json.dumps(label, separators=(",", ":")).encode("utf-8")
+    return Binary(zlib.compress(raw, 6))
+
+
+def decompress_label(blob):
+    return json.loads(zlib.decompress(bytes(blob)).decode("utf-8"))
+
+
+def store_label_blobs(database, labels):
+    """Upsert compressed full labels into `label_blobs` next to the summaries."""
+    ops = [
+        ReplaceOne({"_id": label["id"]}, {"_id": label["id"], "label": compress_label(label)}, upsert=True)
+        for label in labels if label and label.get("id")
+    ]
+    if ops:
+        database[BLOB_COLLECTION].bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def load_label(database, label_id):
+    """Fetch and inflate one full label, or None."""
+    if not label_id:
+        return None
+    doc = database[BLOB_COLLECTION].find_one({"_id": label_id}, {"label": 1})
+    return decompress_label(doc["label"]) if doc else None
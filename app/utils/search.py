@@ -0,0 +1,214 @@
+# utils/search.py
+
+import base64
+import json
+import logging
+import re
+import time
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, TEXT
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+
+TEXT_INDEX_NAME = "medicine_text"
+TEXT_INDEX_FIELDS = [
+    ("name", TEXT),
+    ("brand_names", TEXT),
+    ("generic_names", TEXT),
+    ("indications", TEXT),
+]
+TEXT_INDEX_WEIGHTS = {
+    "name": 10,
+    "brand_names": 8,
+    "generic_names": 8,
+    "indications": 1,
+}
+
+# Only what search_results.html / dashboard.html render. The fda.* fields
+# cover documents stored before migrate_labels.py slimmed them down.
+RESULT_PROJECTION = {
+    "name": 1,
+    "label_id": 1,
+    "indications": 1,
+    "dosage": 1,
+    "contraindications": 1,
+    "fda.indications_and_usage": 1,
+    "fda.dosage_and_administration": 1,
+    "fda.contraindications": 1,
+}
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# (collection full_name, "text"|"name") pairs known to exist, and when
+# creating one last failed
+_indexed = set()
+_failed_at = {}
+INDEX_RETRY_SECONDS = 60
+
+logger = logging.getLogger(__name__)
+
+
+def dedupe_by_name(collection):
+    """
+    Delete all but the oldest document per name: duplicates stored by
+    lookups that raced before the unique index existed. Returns how many
+    documents were removed.
+    """
+    pipeline = [
+        {"$group": {"_id": "$name", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    removed = 0
+    for group in collection.aggregate(pipeline, allowDiskUse=True):
+        extra = sorted(group["ids"])[1:]
+        removed += collection.delete_many({"_id": {"$in": extra}}).deleted_count
+    if removed:
+        logger.warning(f"Removed {removed} duplicate document(s) from {collection.full_name}")
+    return removed
+
+
+def _ensure_index(collection, index, create):
+    key = (collection.full_name, index)
+    if key in _indexed:
+        return
+    # A failing create_index is retried after a pause, not on every request
+    failed = _failed_at.get(key)
+    if failed is not None and time.monotonic() - failed < INDEX_RETRY_SECONDS:
+        return
+    try:
+        create()
+    except PyMongoError as e:
+        _failed_at[key] = time.monotonic()
+        logger.warning(f"Search {index} index error on {collection.full_name}: {e}")
+        return
+    _failed_at.pop(key, None)
+    _indexed.add(key)
+
+
+# ✅ Text index for ranked search plus a unique name index for prefix lookups
+def ensure_search_indexes(collection, dedupe=False):
+    """
+    The two indexes are created independently, so duplicate names blocking
+    the unique index never leave ranked search without its text index. The
+    unique index also keeps concurrent cache misses from storing duplicate
+    medicine documents; with dedupe=True (warm-up, migrations) existing
+    duplicates are removed so it can be built.
+    """
+    _ensure_index(collection, "text", lambda: collection.create_index(
+        TEXT_INDEX_FIELDS, weights=TEXT_INDEX_WEIGHTS, name=TEXT_INDEX_NAME, default_language="english"))
+
+    def create_name_index():
+        try:
+            collection.create_index([("name", ASCENDING)], unique=True)
+        except DuplicateKeyError:
+            if not dedupe:
+                raise
+            dedupe_by_name(collection)
+            collection.create_index([("name", ASCENDING)], unique=True)
+
+    if dedupe:
+        _failed_at.pop((collection.full_name, "name"), None)
+    _ensure_index(collection, "name", create_name_index)
+
+
+def encode_cursor(position):
+    raw = json.dumps(position).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Return the position dict stored in an opaque cursor, or None for a
+    missing/garbled one. Text-search positions carry the last score and
+    _id; prefix-search positions carry the last name.
+    """
+    if not cursor:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if "n" in data:
+            return {"n": str(data["n"])}
+        return {"s": float(data["s"]), "id": ObjectId(data["id"])}
+    except Exception:
+        return None
+
+
+def _first(value):
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def to_result(doc):
+    """Shape a projected medicine document into what the templates render."""
+    fda = doc.get("fda") or {}
+    dosage = doc.get("dosage") or {"adult": _first(fda.get("dosage_and_administration"))}
+    return {
+        "name": doc.get("name"),
+        "label_id": doc.get("label_id") or fda.get("id"),
+        "indications": doc.get("indications") or _first(fda.get("indications_and_usage")),
+        "dosage": dosage,
+        "contraindications": doc.get("contraindications") or _first(fda.get("contraindications")),
+    }
+
+
+# ✅ Ranked, paginated search over the stored labels
+def search_medicines(collection, query, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Search medicines by relevance using the text index, falling back to an
+    index-served name prefix match for partial words. Returns
+    (results, next_cursor); next_cursor is None on the last page.
+    """
+    query = (query or "").strip()
+    if not query:
+        return [], None
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    ensure_search_indexes(collection)
+    after = decode_cursor(cursor)
+    if after and "n" in after:
+        return _prefix_search(collection, query, limit, after["n"])
+
+    pipeline = [
+        {"$match": {"$text": {"$search": query}}},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if after:
+        pipeline.append({"$match": {"$or": [
+            {"score": {"$lt": after["s"]}},
+            {"score": after["s"], "_id": {"$gt": after["id"]}},
+        ]}})
+    pipeline += [
+        {"$sort": {"score": -1, "_id": 1}},
+        {"$limit": limit + 1},
+        {"$project": dict(RESULT_PROJECTION, score=1)},
+    ]
+    try:
+        docs = list(collection.aggregate(pipeline))
+    except OperationFailure as e:
+        # No text index (its creation failed or it was dropped): prefix-match names instead
+        logger.warning(f"Text search failed on {collection.full_name}: {e}")
+        return _prefix_search(collection, query, limit)
+
+    # Nothing matched a whole word: try the name as a prefix ("ibupro")
+    if not docs and after is None:
+        return _prefix_search(collection, query, limit)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor({"s": docs[-1]["score"], "id": str(docs[-1]["_id"])})
+    return [to_result(doc) for doc in docs], next_cursor
+
+
+def _prefix_search(collection, query, limit, after_name=None):
+    # Names are stored normalized (lower-case), so an anchored regex is a range scan on the name index
+    name_filter = {"$regex": "^" + re.escape(query.lower())}
+    if after_name is not None:
+        name_filter["$gt"] = after_name
+    docs = list(collection.find({"name": name_filter}, RESULT_PROJECTION)
+                .sort("name", ASCENDING).limit(limit + 1))
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor({"n": docs[-1]["name"]})
+    return [to_result(doc) for doc in docs], next_cursor
@@ -0,0 +1,278 @@
+# utils/suggest.py
+
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+from bson.objectid import ObjectId
+from pymongo.errors import PyMongoError
+from app.utils.helpers import normalize_drug_name
+
+logger = logging.getLogger(__name__)
+
+MAX_SUGGESTIONS = 20
+# Prefixes matching more names than this are too wide to rank per keystroke;
+# their top entries are cached and kept current as names are added
+SCAN_LIMIT = 200
+MIN_FUZZY_LEN = 3
+FUZZY_WINDOW = 3
+_END = "\uffff"  # sorts after every character a normalized name contains
+
+# Summary fields, plus the raw openfda block for labels stored before
+# migrate_labels.py: nested under `fda` in `medicines`, top-level in `drugs`
+_NAME_FIELDS = (("generic_names", "generic_name", "generic"),
+                ("brand_names", "brand_name", "brand"),
+                ("substance_names", "substance_name", "synonym"))
+
+SUGGEST_PROJECTION = dict(
+    {"_id": 1, "name": 1},
+    **{field: 1 for summary, raw, _ in _NAME_FIELDS
+       for field in (summary, f"openfda.{raw}", f"fda.openfda.{raw}")},
+)
+
+# Re-read this far behind the newest _id seen, so documents that commit out
+# of _id order (concurrent workers, importers, client clock skew) are not missed
+REFRESH_LOOKBACK = timedelta(minutes=5)
+
+
+def _document_names(doc):
+    """(text, kind) pairs a stored label can be found by."""
+    openfda = doc.get("openfda") or (doc.get("fda") or {}).get("openfda") or {}
+    names = [(doc.get("name"), "generic")]
+    for summary, raw, kind in _NAME_FIELDS:
+        names += [(n, kind) for n in doc.get(summary) or openfda.get(raw) or []]
+    return [(normalize_drug_name(text), kind) for text, kind in names if text]
+
+
+# ✅ Sorted-array prefix index over drug names with popularity-weighted top-k
+class SuggestIndex:
+    def __init__(self, get_collections, refresh_interval=30):
+        # Resolved lazily so the index can be built after fork, per worker
+        self._get_collections = get_collections
+        self.refresh_interval = refresh_interval
+        self._keys = []        # sorted normalized names
+        self._entries = {}     # key -> {"text", "name", "kind", "weight"}
+        self._top = {}         # wide prefix -> keys ordered by weight
+        self._watermarks = {}  # collection full_name -> newest _id creation time seen
+        self._recent = {}      # collection full_name -> {_id: creation time} within the lookback
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._building = False  # first load in progress: _keys is sorted once at the end
+        self._refreshing = False
+        self._last_refresh = 0.0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _weight(self, key):
+        return self._entries[key]["weight"]
+
+    def _promote(self, key):
+        """Keep cached top lists right after `key` was added or got heavier."""
+        for size in range(1, len(key) + 1):
+            top = self._top.get(key[:size])
+            if top is None:
+                continue
+            if key not in top:
+                top.append(key)
+            top.sort(key=self._weight, reverse=True)
+            del top[MAX_SUGGESTIONS:]
+
+    def add(self, text, name, kind="generic", weight=1):
+        key = normalize_drug_name(text)
+        if not key:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = {"text": key, "name": name or key, "kind": kind, "weight": weight}
+                if self._building:
+                    return
+                insort(self._keys, key)
+            else:
+                entry["weight"] += weight
+            self._promote(key)
+
+    def add_document(self, doc):
+        names = _document_names(doc)
+        canonical = doc.get("name") or (names[0][0] if names else None)
+        for text, kind in names:
+            self.add(text, canonical, kind)
+
+    def bump(self, name, amount=5):
+        """Make a name that was just looked up rank higher."""
+        key = normalize_drug_name(name)
+        with self._lock:
+            if key in self._entries:
+                self._entries[key]["weight"] += amount
+                self._promote(key)
+
+    # -- loading ----------------------------------------------------------
+    def load(self):
+        """Full build; later refreshes only pick up new documents. Warm-up calls this."""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            self._building = True
+        # insort per name is quadratic over a full catalogue; collect entries
+        # and sort once (queries keep using the previous _keys meanwhile)
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._building = False
+                self._keys = sorted(self._entries)
+                self._top.clear()
+                self._cache_wide_prefixes()
+
+    def _new_documents(self, collection):
+        """Documents created since the last refresh, re-reading the lookback window."""
+        query = {}
+        watermark = self._watermarks.get(collection.full_name)
+        if watermark is not None:
+            query = {"_id": {"$gt": ObjectId.from_datetime(watermark - REFRESH_LOOKBACK)}}
+        recent = self._recent.setdefault(collection.full_name, {})
+        for doc in collection.find(query, SUGGEST_PROJECTION):
+            _id = doc["_id"]
+            if _id in recent:
+                continue  # already counted in an earlier, overlapping refresh
+            if isinstance(_id, ObjectId):
+                created = _id.generation_time
+                recent[_id] = created
+                if watermark is None or created > watermark:
+                    watermark = created
+            yield doc
+        if watermark is not None:
+            self._watermarks[collection.full_name] = watermark
+            cutoff = watermark - REFRESH_LOOKBACK
+            for _id in [i for i, created in recent.items() if created < cutoff]:
+                del recent[_id]
+
+    def refresh(self):
+        """Add documents inserted since the last refresh (by any process)."""
+        started = time.perf_counter()
+        added = 0
+        for collection in self._get_collections():
+            # One unreachable database (e.g. the drugs catalogue) doesn't hold back the others
+            try:
+                for doc in self._new_documents(collection):
+                    self.add_document(doc)
+                    added += 1
+            except PyMongoError as e:
+                logger.warning(f"Suggest index refresh failed for {collection.full_name}: {e}")
+        self._last_refresh = time.monotonic()
+        if added:
+            logger.info(f"Suggest index: {added} document(s) added in "
+                        f"{(time.perf_counter() - started) * 1000:.1f}ms, {len(self._keys)} names")
+
+    def _refresh_in_background(self):
+        try:
+            if self._loaded:
+                self.refresh()
+            else:
+                self.load()
+        finally:
+            self._refreshing = False
+
+    def maybe_refresh(self):
+        """
+        Start a background load or refresh when one is due. Never blocks a
+        request: until the first load finishes, suggestions are just empty.
+        """
+        with self._lock:
+            if self._refreshing:
+                return
+            if self._loaded and time.monotonic() - self._last_refresh < self.refresh_interval:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, name="suggest-refresh", daemon=True).start()
+
+    # -- queries ----------------------------------------------------------
+    def _range(self, prefix):
+        lo = bisect_left(self._keys, prefix)
+        return lo, bisect_left(self._keys, prefix + _END, lo)
+
+    def _has_prefix(self, prefix):
+        lo = bisect_left(self._keys, prefix)
+        return lo < len(self._keys) and self._keys[lo].startswith(prefix)
+
+    def _next_chars(self, prefix):
+        """Characters that follow prefix in some name: one trie level, via bisect."""
+        lo, hi = self._range(prefix)
+        size = len(prefix)
+        chars = []
+        while lo < hi:
+            key = self._keys[lo]
+            if len(key) == size:
+                lo += 1
+                continue
+            chars.append(key[size])
+            lo = bisect_left(self._keys, key[:size + 1] + _END, lo, hi)
+        return chars
+
+    def _cache_wide_prefixes(self, prefix=""):
+        for char in self._next_chars(prefix):
+            child = prefix + char
+            lo, hi = self._range(child)
+            if hi - lo > SCAN_LIMIT:
+                self._top[child] = heapq.nlargest(MAX_SUGGESTIONS, self._keys[lo:hi], key=self._weight)
+                self._cache_wide_prefixes(child)
+
+    def _prefix_matches(self, prefix, limit):
+        lo, hi = self._range(prefix)
+        if hi - lo <= SCAN_LIMIT:
+            return heapq.nlargest(limit, self._keys[lo:hi], key=self._weight)
+        top = self._top.get(prefix)
+        if top is None:
+            top = self._top[prefix] = heapq.nlargest(MAX_SUGGESTIONS, self._keys[lo:hi], key=self._weight)
+        return top[:limit]
+
+    def _fuzzy_matches(self, prefix, limit, exclude):
+        """
+        Names one delete, transpose, replace or insert away from prefix. The
+        typo is looked for just before the point where prefix stops matching
+        any name, and replacements/inserts only try characters the index has
+        there, so a lookup costs a few dozen bisects rather than one per letter.
+        """
+        known = 0
+        while known < len(prefix) and self._has_prefix(prefix[:known + 1]):
+            known += 1
+        variants = set()
+        for i in range(max(0, known - FUZZY_WINDOW + 1), known + 1):
+            head, tail = prefix[:i], prefix[i:]
+            if tail:
+                variants.add(head + tail[1:])
+            if len(tail) > 1:
+                variants.add(head + tail[1] + tail[0] + tail[2:])
+            for char in self._next_chars(head):
+                if tail and char != tail[0]:
+                    variants.add(head + char + tail[1:])
+                variants.add(head + char + tail)
+        variants.discard(prefix)
+
+        found = set()
+        for variant in variants:
+            found.update(self._prefix_matches(variant, limit))
+        found.difference_update(exclude)
+        return heapq.nlargest(limit, found, key=self._weight)
+
+    def suggest(self, query, limit=10):
+        """Top names starting with query, then near-misses one typo away."""
+        prefix = normalize_drug_name(query)
+        limit = max(1, min(limit, MAX_SUGGESTIONS))
+        if not prefix:
+            return []
+        # The refresh thread inserts into _keys and re-sorts _top lists in place
+        with self._lock:
+            keys = self._prefix_matches(prefix, limit)
+            if len(keys) < limit and len(prefix) >= MIN_FUZZY_LEN:
+                keys = keys + self._fuzzy_matches(prefix, limit - len(keys), keys)
+            results = []
+            for key in keys:
+                entry = self._entries[key]
+                results.append({"text": entry["text"], "name": entry["name"], "kind": entry["kind"],
+                                "fuzzy": not key.startswith(prefix)})
+        return results
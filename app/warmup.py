@@ -0,0 +1,57 @@
+# warmup.py
+
+import logging
+import time
+from pymongo.errors import PyMongoError
+from .db import get_drug_collection, mongo
+
+logger = logging.getLogger(__name__)
+
+
+def _step(name, fn):
+    started = time.perf_counter()
+    try:
+        fn()
+    except PyMongoError as e:
+        # Never keep a worker from booting; the lazy paths retry on first use
+        logger.warning(f"Warm-up step '{name}' failed: {e}")
+        return False
+    logger.info(f"Warm-up step '{name}' took {(time.perf_counter() - started) * 1000:.1f}ms")
+    return True
+
+
+def _ping():
+    mongo.cx.admin.command("ping")
+
+
+# ✅ Run once per deployment (e.g. in the gunicorn master)
+def create_indexes():
+    from .medicine_routes import interaction_index
+    from .utils.cache import _registry
+    from .utils.search import ensure_search_indexes
+
+    # Skip everything else rather than wait out one timeout per step
+    if not _step("ping", _ping):
+        return
+    _step("medicines indexes", lambda: ensure_search_indexes(mongo.db.medicines, dedupe=True))
+    _step("users index", lambda: mongo.db.users.create_index("username"))
+    _step("drugs index", lambda: get_drug_collection().create_index("id", unique=True))
+    _step("interaction indexes", interaction_index.ensure_indexes)
+    for cache in _registry.values():
+        if cache.mongo is not None:
+            _step(f"{cache.name} cache indexes", cache.mongo.ensure_indexes)
+
+
+# ✅ Run in every worker after fork, before it takes traffic
+def prime_caches():
+    from .medicine_routes import interaction_index, suggest_index
+
+    # The ping also opens the worker's first pooled connection
+    if _step("connection pool", _ping):
+        _step("interaction index", interaction_index.load)
+        _step("suggest index", suggest_index.load)
+
+
+def warm_up():
+    create_indexes()
+    prime_caches()
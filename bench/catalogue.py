@@ -0,0 +1,61 @@
+# bench/catalogue.py
+
+"""Deterministic synthetic openFDA labels for seeding benchmark databases."""
+
+import random
+
+_SYLLABLES = ["ab", "cor", "dex", "fen", "gli", "hy", "lor", "met", "nol", "pra",
+              "quin", "ram", "sar", "tol", "vir", "xa", "zep", "mab", "pril", "statin"]
+_CONDITIONS = ["hypertension", "pain", "fever", "infection", "diabetes", "asthma",
+               "migraine", "insomnia", "allergy", "arthritis", "depression", "angina"]
+_FILLER = ("This product is indicated for the management of symptoms in adults. "
+           "Use the lowest effective dose for the shortest duration consistent with treatment goals. ")
+
+
+def drug_name(i):
+    rng = random.Random(i)
+    return "".join(rng.choice(_SYLLABLES) for _ in range(3)) + str(i)
+
+
+def synthetic_label(name, i=None):
+    """A label with roughly the size and shape of a real openFDA record."""
+    rng = random.Random(name if i is None else i)
+    conditions = rng.sample(_CONDITIONS, 2)
+    return {
+        "id": f"bench-{name}",
+        "set_id": f"set-{name}",
+        "openfda": {
+            "generic_name": [name.upper()],
+            "brand_name": [f"{name.capitalize()} XR"],
+            "substance_name": [name.upper()],
+            "route": ["ORAL"],
+        },
+        "indications_and_usage": [f"{name} is indicated for {' and '.join(conditions)}. " + _FILLER * 3],
+        "dosage_and_administration": [f"Adults: {rng.choice([5, 10, 20, 40])} mg once daily. " + _FILLER * 2],
+        "contraindications": [f"Hypersensitivity to {name}. " + _FILLER],
+        "warnings": [_FILLER * 12],
+        "adverse_reactions": [_FILLER * 10],
+        "description": [_FILLER * 4],
+    }
+
+
+def catalogue(size):
+    for i in range(size):
+        name = drug_name(i)
+        yield synthetic_label(name, i)
+
+
+def search_terms(size, count, seed=0):
+    """Query terms that hit the catalogue: exact names, name prefixes and conditions."""
+    rng = random.Random(seed)
+    terms = []
+    for _ in range(count):
+        kind = rng.random()
+        name = drug_name(rng.randrange(size))
+        if kind < 0.5:
+            terms.append(name)
+        elif kind < 0.8:
+            terms.append(name[:4])
+        else:
+            terms.append(rng.choice(_CONDITIONS))
+    return terms
@@ -0,0 +1,97 @@
+# bench/fake_upstream.py
+
+"""Local stand-in for the openFDA label and RxNav endpoints with configurable latency."""
+
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from bench.catalogue import synthetic_label
+
+
+def _rxcui(name):
+    # Stable fake RxCUI per name
+    return str(zlib.crc32(name.encode()) % 900000 + 100000)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real upstreams
+    # Headers and body go out in separate writes; without TCP_NODELAY, Nagle
+    # plus delayed ACKs stall every keep-alive response by ~40ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.count()
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/drug/label.json":
+            search = query.get("search", "")
+            name = search.split(":", 1)[-1].strip('"').lower()
+            if name in server.missing:
+                return self._send(404, {"error": {"code": "NOT_FOUND"}})
+            body = {"meta": {"results": {"total": 1}}, "results": [synthetic_label(name)]}
+        elif url.path == "/REST/rxcui.json":
+            name = query.get("name", "").lower()
+            ids = [] if name in server.missing else [_rxcui(name)]
+            body = {"idGroup": {"name": name, "rxnormId": ids} if ids else {"name": name}}
+        elif url.path == "/REST/interaction/interaction.json":
+            rxcui = query.get("rxcui", "")
+            partners = [str(int(rxcui) + i) for i in (1, 2, 3)] if rxcui.isdigit() else []
+            body = {"interactionTypeGroup": [{"interactionType": [{"interactionPair": [
+                {
+                    "interactionConcept": [
+                        {"minConceptItem": {"rxcui": rxcui, "name": f"drug {rxcui}"}},
+                        {"minConceptItem": {"rxcui": p, "name": f"drug {p}"}},
+                    ],
+                    "severity": "N/A",
+                    "description": f"Interaction between {rxcui} and {p}.",
+                }
+                for p in partners
+            ]}]}]}
+        else:
+            return self._send(404, {"error": "unknown path"})
+        self._send(200, body)
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeUpstream(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.05, jitter=0.0, missing=(), port=0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.missing = set(missing)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
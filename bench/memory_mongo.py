@@ -0,0 +1,358 @@
+# bench/memory_mongo.py
+
+"""
+In-memory stand-in for the slice of the pymongo API the app uses, so the
+benchmarks can run without a mongod. It keeps hash indexes for equality
+lookups and an inverted index for $text so query cost scales roughly the
+way the real indexes do; absolute numbers are not comparable to MongoDB.
+Pass --mongo-uri to benchmark against a real server instead.
+"""
+
+import copy
+import re
+import threading
+from bson.objectid import ObjectId
+from pymongo import TEXT
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(value):
+    if isinstance(value, list):
+        return [t for v in value for t in _tokens(v)]
+    if isinstance(value, str):
+        return _TOKEN.findall(value.lower())
+    return []
+
+
+def _get(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def _set(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _compare(value, op, arg):
+    if op == "$in":
+        return value in arg or (isinstance(value, list) and any(v in arg for v in value))
+    if op == "$exists":
+        return (value is not None) == bool(arg)
+    if op == "$regex":
+        return isinstance(value, str) and re.search(arg, value) is not None
+    if op == "$options":
+        return True
+    if value is None:
+        return False
+    try:
+        return {"$gt": value > arg, "$gte": value >= arg, "$lt": value < arg,
+                "$lte": value <= arg, "$ne": value != arg}[op]
+    except TypeError:
+        return False
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+            continue
+        if key == "$text":
+            continue  # resolved by the collection's inverted index
+        value = _get(doc, key)
+        if isinstance(cond, dict) and any(k.startswith("$") for k in cond):
+            if not all(_compare(value, op, arg) for op, arg in cond.items()):
+                return False
+        elif not (value == cond or (isinstance(value, list) and cond in value)):
+            return False
+    return True
+
+
+def project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    include_id = projection.get("_id", 1)
+    fields = [k for k, v in projection.items() if v and k != "_id"]
+    if not fields:
+        out = copy.deepcopy(doc)
+        for k, v in projection.items():
+            if not v:
+                out.pop(k, None)
+        return out
+    out = {}
+    for path in fields:
+        value = _get(doc, path)
+        if value is not None:
+            _set(out, path, copy.deepcopy(value))
+    if include_id and "_id" in doc:
+        out["_id"] = doc["_id"]
+    return out
+
+
+class _Result:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+
+class Cursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, key, direction=1):
+        self._docs.sort(key=lambda d: (_get(d, key) is None, _get(d, key)), reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        if n:
+            self._docs = self._docs[:n]
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def __iter__(self):
+        return iter(self._docs)
+
+
+class Collection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.full_name = f"{database.name}.{name}"
+        self._docs = {}
+        self._lock = threading.RLock()
+        self._hash = {}       # field -> {value: set(_id)}
+        self._unique = set()
+        self._text = None     # (weights, {token: {_id: weight}})
+
+    # -- indexes ----------------------------------------------------------
+    def create_index(self, keys, unique=False, weights=None, **kwargs):
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        with self._lock:
+            if any(kind == TEXT for _, kind in keys):
+                fields = {field: (weights or {}).get(field, 1) for field, _ in keys}
+                self._text = (fields, {})
+                for doc in self._docs.values():
+                    self._index_text(doc)
+            elif len(keys) == 1:
+                field = keys[0][0]
+                table = {}
+                for doc in self._docs.values():
+                    table.setdefault(_get(doc, field), set()).add(doc["_id"])
+                # Like mongod, a unique index can't be built over existing duplicates
+                if unique and any(len(ids) > 1 for ids in table.values()):
+                    raise DuplicateKeyError(f"E11000 duplicate key {field}")
+                self._hash[field] = table
+                if unique:
+                    self._unique.add(field)
+        return "_".join(f"{k}_{v}" for k, v in keys)
+
+    def drop_index(self, name):
+        self._text = None
+
+    def _index_text(self, doc):
+        fields, postings = self._text
+        for field, weight in fields.items():
+            for token in _tokens(_get(doc, field)):
+                bucket = postings.setdefault(token, {})
+                bucket[doc["_id"]] = bucket.get(doc["_id"], 0) + weight
+
+    def _index(self, doc):
+        for field, table in self._hash.items():
+            table.setdefault(_get(doc, field), set()).add(doc["_id"])
+        if self._text:
+            self._index_text(doc)
+
+    def _unindex(self, doc):
+        for field, table in self._hash.items():
+            table.get(_get(doc, field), set()).discard(doc["_id"])
+        if self._text:
+            for bucket in self._text[1].values():
+                bucket.pop(doc["_id"], None)
+
+    def _check_unique(self, doc):
+        for field in self._unique:
+            ids = self._hash[field].get(_get(doc, field), set()) - {doc["_id"]}
+            if ids:
+                raise DuplicateKeyError(f"E11000 duplicate key {field}")
+
+    def _candidates(self, query):
+        if "_id" in query and not isinstance(query["_id"], dict):
+            doc = self._docs.get(query["_id"])
+            return [doc] if doc else []
+        for field, cond in query.items():
+            if field in self._hash and not isinstance(cond, dict):
+                return [self._docs[i] for i in self._hash[field].get(cond, ())]
+            if field in self._hash and isinstance(cond, dict) and set(cond) == {"$in"}:
+                ids = set().union(*(self._hash[field].get(v, set()) for v in cond["$in"]))
+                return [self._docs[i] for i in ids]
+        return list(self._docs.values())
+
+    def _text_scores(self, search):
+        postings = self._text[1] if self._text else {}
+        scores = {}
+        for token in set(_tokens(search)):
+            for doc_id, weight in postings.get(token, {}).items():
+                scores[doc_id] = scores.get(doc_id, 0) + weight
+        return scores
+
+    # -- reads ------------------------------------------------------------
+    def find(self, query=None, projection=None):
+        query = query or {}
+        with self._lock:
+            docs = [project(d, projection) for d in self._candidates(query) if matches(d, query)]
+        return Cursor(docs)
+
+    def find_one(self, query=None, projection=None):
+        query = query or {}
+        with self._lock:
+            for doc in self._candidates(query):
+                if matches(doc, query):
+                    return project(doc, projection)
+        return None
+
+    def count_documents(self, query):
+        return len(list(self.find(query)))
+
+    def aggregate(self, pipeline, **kwargs):
+        docs = None
+        scores = {}
+        with self._lock:
+            for stage in pipeline:
+                (op, arg), = stage.items()
+                if op == "$match":
+                    if docs is None:
+                        if "$text" in arg:
+                            if self._text is None:
+                                raise OperationFailure("text index required for $text query", code=27)
+                            scores = self._text_scores(arg["$text"]["$search"])
+                            docs = [copy.deepcopy(self._docs[i]) for i in scores]
+                        else:
+                            docs = [copy.deepcopy(d) for d in self._candidates(arg)]
+                    docs = [d for d in docs if matches(d, arg)]
+                elif op == "$addFields":
+                    for doc in docs:
+                        for field, expr in arg.items():
+                            doc[field] = scores.get(doc["_id"], 0.0) if expr == {"$meta": "textScore"} else expr
+                elif op == "$sort":
+                    for field, direction in reversed(list(arg.items())):
+                        docs.sort(key=lambda d: _get(d, field), reverse=direction < 0)
+                elif op == "$group":
+                    docs = self._group(self._docs.values() if docs is None else docs, arg)
+                elif op == "$limit":
+                    docs = docs[:arg]
+                elif op == "$project":
+                    docs = [project(d, arg) for d in docs]
+        return iter(docs or [])
+
+    @staticmethod
+    def _group(docs, spec):
+        """$group on one "$field" key with $push/$sum accumulators."""
+        def value(doc, expr):
+            return _get(doc, expr[1:]) if isinstance(expr, str) and expr.startswith("$") else expr
+
+        groups = {}
+        for doc in docs:
+            key = value(doc, spec["_id"])
+            group = groups.setdefault(key, {"_id": key})
+            for field, acc in spec.items():
+                if field == "_id":
+                    continue
+                (op, expr), = acc.items()
+                if op == "$push":
+                    group.setdefault(field, []).append(value(doc, expr))
+                elif op == "$sum":
+                    group[field] = group.get(field, 0) + value(doc, expr)
+        return list(groups.values())
+
+    # -- writes -----------------------------------------------------------
+    def insert_one(self, doc):
+        with self._lock:
+            doc.setdefault("_id", ObjectId())
+            stored = copy.deepcopy(doc)
+            self._check_unique(stored)
+            self._docs[stored["_id"]] = stored
+            self._index(stored)
+        return _Result(inserted_id=doc["_id"])
+
+    def _write(self, query, update, upsert, replace):
+        with self._lock:
+            existing = next((d for d in self._candidates(query) if matches(d, query)), None)
+            if existing is None:
+                if not upsert:
+                    return _Result(matched_count=0, modified_count=0, upserted_id=None)
+                doc = {k: v for k, v in query.items() if not isinstance(v, dict) and not k.startswith("$")}
+                if replace:
+                    doc.update(copy.deepcopy(update))
+                else:
+                    for path, value in {**update.get("$setOnInsert", {}), **update.get("$set", {})}.items():
+                        _set(doc, path, copy.deepcopy(value))
+                doc.setdefault("_id", ObjectId())
+                self._check_unique(doc)
+                self._docs[doc["_id"]] = doc
+                self._index(doc)
+                return _Result(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+            new = copy.deepcopy(update) if replace else copy.deepcopy(existing)
+            if replace:
+                new["_id"] = existing["_id"]
+            else:
+                for path, value in update.get("$set", {}).items():
+                    _set(new, path, copy.deepcopy(value))
+            self._check_unique(new)
+            self._unindex(existing)
+            self._docs[new["_id"]] = new
+            self._index(new)
+            return _Result(matched_count=1, modified_count=1, upserted_id=None)
+
+    def update_one(self, query, update, upsert=False):
+        return self._write(query, update, upsert, replace=False)
+
+    def replace_one(self, query, doc, upsert=False):
+        return self._write(query, doc, upsert, replace=True)
+
+    def delete_many(self, query):
+        with self._lock:
+            doomed = [d for d in self._candidates(query) if matches(d, query)]
+            for doc in doomed:
+                self._unindex(doc)
+                del self._docs[doc["_id"]]
+        return _Result(deleted_count=len(doomed))
+
+    def bulk_write(self, ops, ordered=True):
+        upserted = matched = 0
+        for op in ops:
+            replace = type(op).__name__ == "ReplaceOne"
+            result = self._write(op._filter, op._doc, op._upsert, replace)
+            upserted += result.upserted_id is not None
+            matched += result.matched_count
+        return _Result(upserted_count=upserted, matched_count=matched, modified_count=matched)
+
+
+class Database:
+    def __init__(self, name="bench"):
+        self.name = name
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = Collection(self, name)
+            return self._collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def command(self, name, *args):
+        return {"ok": 1}
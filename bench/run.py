@@ -0,0 +1,311 @@
+# bench/run.py
+
+"""
+Offline load-test / benchmark suite.
+
+    python -m bench.run --output bench.json
+    python -m bench.run --mongo-uri mongodb://localhost:27017/medinfo_bench --scenarios search_catalogue
+
+The app runs on a local threaded WSGI server. openFDA/RxNav are replaced by
+bench.fake_upstream and MongoDB by bench.memory_mongo unless --mongo-uri is
+given. Each scenario reports throughput and p50/p95/p99 latency as JSON.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+import requests
+
+from bench.catalogue import catalogue, search_terms
+from bench.fake_upstream import FakeUpstream
+
+SCENARIOS = ["medicine_search_cold", "medicine_search_warm", "search_catalogue", "login_bcrypt", "mixed"]
+USERNAME, PASSWORD = "bench-user", "bench-password"
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    # Nearest-rank: the smallest value with at least pct% of samples at or below it
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def is_ok(response):
+    return response.status_code == 200
+
+
+def redirects_to(path):
+    """Expect a redirect to `path`: a failed login re-renders the form with a 200 instead."""
+    def check(response):
+        return response.status_code == 302 and urlparse(response.headers.get("Location", "")).path == path
+    return check
+
+
+def summarize(name, latencies, errors, elapsed, concurrency, **extra):
+    values = sorted(latencies)
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return dict({
+        "scenario": name,
+        "requests": len(values) + errors,
+        "errors": errors,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "mean": ms(sum(values) / len(values)) if values else None,
+            "p50": ms(percentile(values, 50)),
+            "p95": ms(percentile(values, 95)),
+            "p99": ms(percentile(values, 99)),
+            "max": ms(values[-1]) if values else None,
+        },
+    }, **extra)
+
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.upstream = FakeUpstream(latency=args.upstream_latency_ms / 1000,
+                                     jitter=args.upstream_jitter_ms / 1000,
+                                     missing={"notarealdrug"}).start()
+        # Point the API clients at the fake upstream before the app is imported
+        os.environ["FDA_BASE_URL"] = self.upstream.url
+        os.environ["RXNAV_BASE_URL"] = self.upstream.url
+        os.environ.setdefault("SECRET_KEY", "bench")
+        if args.mongo_uri:
+            os.environ["MONGO_URI"] = args.mongo_uri
+
+        from werkzeug.serving import make_server
+        from app import create_app
+
+        self.app = create_app()
+        self.reset_db()
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no per-request access log
+        self.server = make_server("127.0.0.1", 0, self.app, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+
+    # -- database / cache state ------------------------------------------
+    def reset_db(self):
+        from app import mongo, medicine_routes
+        from app.utils import search
+        from app.utils.cache import _registry
+        from app.utils.interactions import InteractionIndex
+        from app.utils.suggest import SuggestIndex
+
+        if self.args.mongo_uri:
+            for name in mongo.db.list_collection_names():
+                mongo.db.drop_collection(name)
+        else:
+            from bench.memory_mongo import Database
+            mongo.db = Database("bench")
+        search._indexed.clear()
+        search._failed_at.clear()
+        for cache in _registry.values():
+            cache.clear()
+            if cache.mongo is not None:
+                cache.mongo._indexed = False
+        medicine_routes.interaction_index = InteractionIndex(lambda: mongo.db)
+        # The stand-in has no `drugs` catalogue; index what the app itself stores
+        medicine_routes.suggest_index = SuggestIndex(lambda: [mongo.db.medicines])
+
+    def seed(self, size):
+        from app import mongo
+        from openfda_import import upsert_medicines
+        from app.utils.search import ensure_search_indexes
+
+        ensure_search_indexes(mongo.db.medicines)
+        batch = []
+        for label in catalogue(size):
+            batch.append(label)
+            if len(batch) == 1000:
+                upsert_medicines(mongo.db.medicines, batch)
+                batch = []
+        upsert_medicines(mongo.db.medicines, batch)
+
+    def create_user(self):
+        requests.post(f"{self.base}/signup", data={"username": USERNAME, "password": PASSWORD},
+                      allow_redirects=False)
+
+    def logged_in_session(self):
+        session = requests.Session()
+        session.post(f"{self.base}/login", data={"username": USERNAME, "password": PASSWORD},
+                     allow_redirects=False)
+        return session
+
+    # -- load driver ------------------------------------------------------
+    def drive(self, name, request, total, concurrency, session_factory=requests.Session, expect=is_ok, **extra):
+        """
+        Issue `total` requests from `concurrency` threads; request(session, i)
+        returns a Response, which counts as an error unless expect(response).
+        """
+        latencies, errors = [], 0
+        lock = threading.Lock()
+        counter = iter(range(total))
+        sessions = [session_factory() for _ in range(concurrency)]
+        upstream_before = self.upstream.requests
+
+        def worker(session):
+            nonlocal errors
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                started = time.perf_counter()
+                try:
+                    ok = expect(request(session, i))
+                except requests.RequestException:
+                    ok = False
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if ok:
+                        latencies.append(elapsed)
+                    else:
+                        errors += 1
+
+        threads = [threading.Thread(target=worker, args=(s,)) for s in sessions]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        result = summarize(name, latencies, errors, time.perf_counter() - started, concurrency,
+                           upstream_requests=self.upstream.requests - upstream_before, **extra)
+        print(f"  {name}: {result['throughput_rps']} req/s, p50 {result['latency_ms']['p50']} ms, "
+              f"p99 {result['latency_ms']['p99']} ms, {errors} errors", file=sys.stderr)
+        return result
+
+    # -- scenarios --------------------------------------------------------
+    def medicine_search_cold(self):
+        self.reset_db()
+        run = random.randrange(1 << 30)
+        return [self.drive(
+            "medicine_search_cold",
+            lambda s, i: s.get(f"{self.base}/medicine/search", params={"query": f"cold{run}x{i}"}),
+            self.args.requests, self.args.concurrency,
+        )]
+
+    def medicine_search_warm(self):
+        self.reset_db()
+        names = [f"warm{i}" for i in range(50)]
+        for name in names:  # prime medicines + caches
+            requests.get(f"{self.base}/medicine/search", params={"query": name})
+        return [self.drive(
+            "medicine_search_warm",
+            lambda s, i: s.get(f"{self.base}/medicine/search", params={"query": names[i % len(names)]}),
+            self.args.requests, self.args.concurrency,
+        )]
+
+    def search_catalogue(self):
+        results = []
+        for size in self.args.catalogue_sizes:
+            self.reset_db()
+            self.seed(size)
+            self.create_user()
+            terms = search_terms(size, self.args.requests, seed=size)
+            results.append(self.drive(
+                f"search_catalogue_{size}",
+                lambda s, i: s.post(f"{self.base}/search", data={"query": terms[i]}, allow_redirects=False),
+                self.args.requests, self.args.concurrency,
+                session_factory=self.logged_in_session, catalogue_size=size,
+            ))
+        return results
+
+    def login_bcrypt(self):
+        self.reset_db()
+        self.create_user()
+        total = max(1, self.args.requests // 5)  # each login is a full bcrypt check
+        return [self.drive(
+            "login_bcrypt",
+            lambda s, i: s.post(f"{self.base}/login", data={"username": USERNAME, "password": PASSWORD},
+                                allow_redirects=False),
+            total, self.args.concurrency, expect=redirects_to("/dashboard"),
+        )]
+
+    def mixed(self):
+        size = min(self.args.catalogue_sizes)
+        self.reset_db()
+        self.seed(size)
+        self.create_user()
+        terms = search_terms(size, self.args.requests, seed=1)
+        warm = [f"mixed{i}" for i in range(20)]
+        for name in warm:
+            requests.get(f"{self.base}/medicine/search", params={"query": name})
+
+        def request(s, i):
+            pick = random.Random(i).random()
+            if pick < 0.5:
+                return s.post(f"{self.base}/search", data={"query": terms[i]}, allow_redirects=False)
+            if pick < 0.8:
+                return s.get(f"{self.base}/medicine/search", params={"query": warm[i % len(warm)]})
+            if pick < 0.9:
+                return s.get(f"{self.base}/medicine/search", params={"query": f"mixedcold{i}"})
+            return s.get(f"{self.base}/medicine/interactions",
+                         params={"drugs": ",".join(warm[(i + k) % len(warm)] for k in range(3))})
+
+        return [self.drive("mixed", request, self.args.requests, self.args.mixed_concurrency,
+                           session_factory=self.logged_in_session, catalogue_size=size)]
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Med Info benchmark scenarios offline.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mixed-concurrency", type=int, default=32)
+    parser.add_argument("--catalogue-sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--upstream-latency-ms", type=float, default=50)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=10)
+    parser.add_argument("--mongo-uri", help="benchmark against this (disposable!) database instead of memory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    random.seed(args.seed)
+
+    bench = Bench(args)
+    results = []
+    for scenario in args.scenarios:
+        print(f"Running {scenario}", file=sys.stderr)
+        results.extend(getattr(bench, scenario)())
+
+    report = {
+        "meta": {
+            "git_revision": _git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mongo": "uri" if args.mongo_uri else "memory",
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "mongo_uri")},
+        },
+        "scenarios": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# bench/startup.py
+
+"""
+Startup cost of the production serving mode.
+
+    python -m bench.startup --output startup.json
+    python -m bench.startup --app "app:create_app()" --no-preload   # per-worker import, for comparison
+
+Reports how long `create_app()` takes and how many threads exist once it
+returns (an eagerly connected Mongo client shows up as monitor threads),
+then boots gunicorn and times how long it takes until the workers serve
+requests. The gunicorn hooks in gunicorn.conf.py are skipped: their
+warm-up needs a reachable MongoDB and is timed by its own log lines.
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+_CREATE_APP = (
+    "import threading, time; started = time.perf_counter(); "
+    "from app import create_app; create_app(); "
+    "print(time.perf_counter() - started, threading.active_count())"
+)
+
+
+def measure_create_app(runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _CREATE_APP], capture_output=True, text=True, check=True)
+        seconds, threads = out.stdout.split()
+        samples.append((float(seconds), int(threads)))
+    return {
+        "create_app_ms": round(statistics.median(s for s, _ in samples) * 1000, 1),
+        "threads_after_create_app": samples[0][1],
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_mb(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmRSS"))
+        except (OSError, StopIteration):
+            pass
+    return total / 1024
+
+
+def measure_boot(app, workers, threads, preload, responses=20, timeout=60):
+    """Seconds from spawning gunicorn until `responses` requests have been served."""
+    port = _free_port()
+    cmd = ["gunicorn", "-c", os.devnull, "-b", f"127.0.0.1:{port}", "-w", str(workers),
+           "-k", "gthread", "--threads", str(threads)] + (["--preload"] if preload else []) + [app]
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        served = 0
+        deadline = time.monotonic() + timeout
+        while served < responses:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"gunicorn did not serve {responses} requests within {timeout}s")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/login", timeout=2).read()
+                served += 1
+            except OSError:
+                time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+        time.sleep(0.5)  # let every worker finish booting before sampling memory
+        children = subprocess.run(["pgrep", "-P", str(proc.pid)], capture_output=True, text=True).stdout.split()
+        return elapsed, _rss_mb(children + [str(proc.pid)])
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure app import and pre-forked worker boot time.")
+    parser.add_argument("--app", default="wsgi:app")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--no-preload", action="store_true", help="import the app in every worker")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    os.environ.setdefault("SECRET_KEY", "bench")
+
+    report = measure_create_app(max(args.runs, 5))
+    boots = [measure_boot(args.app, args.workers, args.threads, not args.no_preload) for _ in range(args.runs)]
+    report.update({
+        "app": args.app,
+        "workers": args.workers,
+        "preload": not args.no_preload,
+        "boot_to_serving_s": round(statistics.median(b[0] for b in boots), 3),
+        "total_rss_mb": round(statistics.median(b[1] for b in boots), 1),
+    })
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
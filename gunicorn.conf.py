@@ -0,0 +1,36 @@
+# gunicorn.conf.py
+# gunicorn -c gunicorn.conf.py wsgi:app  (every setting can be overridden from the environment)
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# Threads let a worker keep serving while requests wait on openFDA/RxNav
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "500"))
+
+# Import the app once in the master and fork it; safe because the Mongo
+# client is only created lazily inside each worker (see app/db.py)
+preload_app = True
+
+# Size each worker's Mongo pool for its request threads plus upstream lookups
+os.environ.setdefault("MONGO_MAX_POOL_SIZE", str(threads * 2))
+
+
+def when_ready(server):
+    # Indexes once per deployment, then drop the master's client before forking
+    from app.db import close_client
+    from app.warmup import create_indexes
+    create_indexes()
+    close_client()
+
+
+def post_worker_init(worker):
+    from app.warmup import prime_caches
+    prime_caches()
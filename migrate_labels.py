@@ -0,0 +1,115 @@
+# migrate_labels.py
+
+import argparse
+import bson
+from pymongo import ReplaceOne
+from pymongo.errors import OperationFailure
+from app.db import get_drug_collection, mongo
+from app.utils.labels import BLOB_COLLECTION, compress_label, label_to_drug, label_to_medicine, store_label_blobs
+from app.utils import search
+from app.utils.search import TEXT_INDEX_NAME, ensure_search_indexes
+
+
+def collection_stats(collection):
+    """Logical data size, on-disk size and index size as reported by collStats."""
+    try:
+        stats = collection.database.command("collStats", collection.name)
+    except OperationFailure:
+        return {"count": 0, "size": 0, "avgObjSize": 0, "storageSize": 0, "totalIndexSize": 0}
+    return {key: stats.get(key, 0) for key in ("count", "size", "avgObjSize", "storageSize", "totalIndexSize")}
+
+
+def _migrate(collection, query, convert, batch_size):
+    """Rewrite matching docs in _id order; returns (docs, bytes before, summary bytes, blob bytes)."""
+    docs = bytes_before = bytes_summary = bytes_blobs = 0
+    ops, labels = [], []
+
+    def flush():
+        nonlocal ops, labels
+        if ops:
+            # Blobs first: a slim summary must never point at a label that isn't stored yet
+            store_label_blobs(collection.database, labels)
+            collection.bulk_write(ops, ordered=False)
+        ops, labels = [], []
+
+    for doc in collection.find(query).sort("_id", 1).batch_size(batch_size):
+        summary, label = convert(doc)
+        if summary is None:
+            continue
+        summary["_id"] = doc["_id"]
+        docs += 1
+        bytes_before += len(bson.encode(doc))
+        bytes_summary += len(bson.encode(summary))
+        if label and label.get("id"):
+            bytes_blobs += len(compress_label(label))
+            labels.append(label)
+        ops.append(ReplaceOne({"_id": doc["_id"]}, summary))
+        if len(ops) >= batch_size:
+            flush()
+    flush()
+    return docs, bytes_before, bytes_summary, bytes_blobs
+
+
+def _medicine(doc):
+    label = doc.get("fda") or {}
+    return label_to_medicine(label, doc.get("interactions"), name=doc.get("name")), label
+
+
+def _drug(doc):
+    label = {k: v for k, v in doc.items() if k != "_id"}
+    return label_to_drug(label), label
+
+
+def migrate(collection, kind, batch_size=500):
+    before = collection_stats(collection)
+    blobs_before = collection_stats(collection.database[BLOB_COLLECTION])
+
+    if kind == "medicines":
+        result = _migrate(collection, {"fda": {"$exists": True}}, _medicine, batch_size)
+        # The text index moved from fda.* paths to the summary fields
+        try:
+            collection.drop_index(TEXT_INDEX_NAME)
+        except OperationFailure:
+            pass
+        search._indexed.discard((collection.full_name, "text"))
+        ensure_search_indexes(collection, dedupe=True)
+    else:
+        # Raw labels carry an "openfda" block; slim summaries do not
+        result = _migrate(collection, {"openfda": {"$exists": True}}, _drug, batch_size)
+
+    after = collection_stats(collection)
+    blobs_after = collection_stats(collection.database[BLOB_COLLECTION])
+    docs, bytes_before, bytes_summary, bytes_blobs = result
+    print(f"{collection.full_name}: migrated {docs} document(s)")
+    if docs:
+        print(f"  documents read per lookup: {bytes_before / docs:,.0f} -> {bytes_summary / docs:,.0f} bytes")
+        print(f"  migrated bytes: {bytes_before:,} -> {bytes_summary:,} summary + {bytes_blobs:,} compressed blobs")
+    print(f"  collStats size: {before['size']:,} -> {after['size']:,} bytes "
+          f"(avgObjSize {before['avgObjSize']:,.0f} -> {after['avgObjSize']:,.0f})")
+    print(f"  {BLOB_COLLECTION} size: {blobs_before['size']:,} -> {blobs_after['size']:,} bytes")
+    print("  storageSize only shrinks after a compact; run with --compact to reclaim space")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Slim stored labels into summaries plus compressed blobs.")
+    parser.add_argument("--target", choices=["drugs", "medicines", "both"], default="both")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--compact", action="store_true", help="run compact afterwards to return space to the OS")
+    args = parser.parse_args(argv)
+
+    collections = []
+    if args.target in ("medicines", "both"):
+        collections.append((mongo.db.medicines, "medicines"))
+    if args.target in ("drugs", "both"):
+        collections.append((get_drug_collection(), "drugs"))
+
+    for collection, kind in collections:
+        migrate(collection, kind, args.batch_size)
+        if args.compact:
+            collection.database.command("compact", collection.name)
+            print(f"  storageSize after compact: {collection_stats(collection)['storageSize']:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,35 @@
 # openfda_import.py
 
-import requests
-from app.db import drug_collection  # adjust if your db.py is elsewhere
+import argparse
+import glob
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.db import get_drug_collection, mongo
+from app.utils.api_clients import FDA_API_KEY, FDA_BASE_URL, UPSTREAM_TIMEOUT, session
+from app.utils.labels import label_to_drug, label_to_medicine, store_label_blobs
+
+LABEL_PATH = "/drug/label.json"
+MAX_PAGE_SIZE = 1000   # openFDA caps limit at 1000
+MAX_SKIP = 25000       # and skip at 25000; deeper pages need search_after
+DEFAULT_CHECKPOINT = ".openfda_import.checkpoint.json"
+
 
 def fetch_openfda_data(search_term, limit=10):
-    base_url = "https://api.fda.gov/drug/label.json"
+    base_url = f"{FDA_BASE_URL}{LABEL_PATH}"
     params = {
         "search": f"openfda.brand_name:{search_term}",
         "limit": limit
     }
 
     try:
-        response = requests.get(base_url, params=params)
+        response = session.get(base_url, params=params, timeout=UPSTREAM_TIMEOUT)
         response.raise_for_status()
         return response.json().get("results", [])
     except Exception as e:
@@ -21,13 +39,408 @@ def fetch_openfda_data(search_term, limit=10):
 def store_data_in_mongo(drug_name):
     results = fetch_openfda_data(drug_name)
     if results:
-        for doc in results:
-            # Avoid duplicates
-            if not drug_collection.find_one({"id": doc.get("id")}):
-                drug_collection.insert_one(doc)
-                print(f"Inserted: {doc.get('id')}")
-            else:
-                print(f"Duplicate skipped: {doc.get('id')}")
+        written = upsert_labels(get_drug_collection(), results)
+        print(f"Upserted {written} label(s) for '{drug_name}'")
     else:
         print("No results found or error occurred.")
 
+
+# ✅ Batched upserts keyed on the label id
+def ensure_label_indexes(collection):
+    collection.create_index("id", unique=True)
+
+
+def upsert_labels(collection, docs):
+    """
+    Replace-or-insert slim label summaries by id in one round trip, with the
+    full labels compressed into `label_blobs`; returns docs written.
+    """
+    ops = [ReplaceOne({"id": doc["id"]}, label_to_drug(doc), upsert=True) for doc in docs if doc.get("id")]
+    if not ops:
+        return 0
+    store_label_blobs(collection.database, docs)
+    try:
+        result = collection.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        # Two writers can race on the same new id; the other upsert already landed
+        others = [err for err in e.details.get("writeErrors", []) if err.get("code") != 11000]
+        if others:
+            raise
+        return e.details.get("nUpserted", 0) + e.details.get("nMatched", 0)
+    return result.upserted_count + result.matched_count
+
+
+def upsert_medicines(collection, labels):
+    """Add labels to `medicines` without overwriting names already looked up live."""
+    ops = []
+    for label in labels:
+        doc = label_to_medicine(label)
+        if doc:
+            ops.append(UpdateOne({"name": doc["name"]}, {"$setOnInsert": doc}, upsert=True))
+    if not ops:
+        return 0
+    store_label_blobs(collection.database, labels)
+    try:
+        return collection.bulk_write(ops, ordered=False).upserted_count
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+        return e.details.get("nUpserted", 0)
+
+
+# ✅ Resumable progress saved next to the importer
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.state = json.load(f)
+
+    def get(self, key, default=None):
+        return self.state.get(key, default)
+
+    def save(self, **values):
+        self.state.update(values)
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)  # atomic, so a crash never leaves half a file
+
+    def clear(self):
+        self.state = {}
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Throughput:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.count = 0
+
+    def add(self, n):
+        self.count += n
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def report(self, prefix=""):
+        print(f"{prefix}{self.count} docs in {time.monotonic() - self.started:.1f}s ({self.rate:.0f} docs/sec)")
+
+
+class LabelImporter:
+    def __init__(self, collection, search=None, page_size=100, concurrency=4,
+                 batch_size=500, checkpoint_path=DEFAULT_CHECKPOINT, max_docs=None):
+        self.collection = collection
+        self.search = search
+        self.page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.max_docs = max_docs
+        self.throughput = Throughput()
+        self._pending = []
+
+    def _params(self, **extra):
+        params = dict(extra)
+        if self.search:
+            params["search"] = self.search
+        if FDA_API_KEY:
+            params["api_key"] = FDA_API_KEY
+        return params
+
+    def _get(self, url, params=None):
+        response = session.get(url, params=params, timeout=UPSTREAM_TIMEOUT)
+        if response.status_code == 404:  # openFDA: no matches
+            return {}, None
+        response.raise_for_status()
+        return response.json(), response.links.get("next", {}).get("url")
+
+    def fetch_page(self, skip):
+        data, _ = self._get(f"{FDA_BASE_URL}{LABEL_PATH}", self._params(limit=self.page_size, skip=skip))
+        return data.get("results", [])
+
+    def total(self):
+        data, _ = self._get(f"{FDA_BASE_URL}{LABEL_PATH}", self._params(limit=1))
+        return data.get("meta", {}).get("results", {}).get("total", 0)
+
+    def _write(self, docs, flush=False):
+        """Buffer docs and bulk-write full batches; returns True when nothing is left buffered."""
+        self._pending.extend(docs)
+        while len(self._pending) >= self.batch_size or (flush and self._pending):
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            self.throughput.add(upsert_labels(self.collection, batch))
+        return not self._pending
+
+    def run(self):
+        ensure_label_indexes(self.collection)
+        if self.checkpoint.get("search", self.search) != self.search:
+            raise SystemExit("Checkpoint belongs to a different --search; use --reset to start over.")
+        total = self.total()
+        if self.max_docs:
+            total = min(total, self.max_docs)
+        print(f"Importing {total} label(s)")
+
+        if total <= MAX_SKIP + self.page_size:
+            self._import_by_skip(total)
+        else:
+            self._import_by_link()
+
+        self.checkpoint.save(done=True)
+        self.throughput.report("Import finished: ")
+
+    def _import_by_skip(self, total):
+        """Fetch skip-addressable pages concurrently, writing them back in order."""
+        skips = list(range(self.checkpoint.get("skip", 0), total, self.page_size))
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            # Keep at most `concurrency` pages in flight so memory stays bounded
+            in_flight = [pool.submit(self.fetch_page, skip) for skip in skips[:self.concurrency]]
+            queued = skips[self.concurrency:]
+            for skip in skips:
+                docs = in_flight.pop(0).result()
+                if queued:
+                    in_flight.append(pool.submit(self.fetch_page, queued.pop(0)))
+                # Only advance the checkpoint once everything before it is in Mongo
+                if self._write(docs):
+                    self.checkpoint.save(search=self.search, skip=skip + self.page_size)
+                self.throughput.report(f"  skip={skip}: ")
+                if not docs:
+                    break
+        self._write([], flush=True)
+
+    def _import_by_link(self):
+        """
+        openFDA only pages past skip=25000 forward through rel=next
+        (search_after) links, so fetching is sequential; the bulk write of
+        each page overlaps with fetching the next one instead.
+        """
+        next_url = self.checkpoint.get("next_url")
+        if next_url:
+            page, next_url = self._get(next_url)
+        else:
+            page, next_url = self._get(f"{FDA_BASE_URL}{LABEL_PATH}", self._params(limit=self.page_size))
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending_write = None
+            while True:
+                docs = page.get("results", [])
+                if pending_write:
+                    pending_write.result()
+                pending_write = writer.submit(self._write, docs, True)
+                if not docs or not next_url:
+                    break
+                if self.max_docs and self.throughput.count >= self.max_docs:
+                    break
+                url = next_url
+                page, next_url = self._get(url)
+                pending_write.result()
+                # next_url's page has not been written yet, so resume from `url`
+                self.checkpoint.save(search=self.search, next_url=url)
+                self.throughput.report("  search_after: ")
+            pending_write.result()
+
+
+# ✅ Offline ingest of the openFDA bulk-download files (drug-label-*.json.zip)
+READ_CHUNK = 1 << 16
+
+
+class _JSONStream:
+    """Incremental reader over a text stream that decodes one JSON value at a time."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buf = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.stream.read(READ_CHUNK)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def next_char(self):
+        """Skip whitespace and return (without consuming) the next character."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.next_char() != char:
+            raise ValueError(f"Expected {char!r} in label dump at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        self.next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Value runs past the end of the buffer: read more and retry
+                if not self._fill():
+                    raise
+                continue
+            # A number at the buffer edge may be cut short; only trust it if more follows
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_dump_labels(stream):
+    """
+    Yield each label in the top-level "results" array of an openFDA dump
+    without holding the whole file (or array) in memory.
+    """
+    reader = _JSONStream(stream)
+    reader.expect("{")
+    while reader.next_char() != "}":
+        key = reader.value()
+        reader.expect(":")
+        if key != "results":
+            reader.value()  # "meta" is small; decode and drop it
+        else:
+            reader.expect("[")
+            while reader.next_char() != "]":
+                yield reader.value()
+                if reader.next_char() == ",":
+                    reader.pos += 1
+            reader.expect("]")
+        if reader.next_char() == ",":
+            reader.pos += 1
+
+
+def iter_dump_file(path):
+    """Labels from a .json.zip (every .json member) or a plain .json dump."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.namelist():
+                if member.endswith(".json"):
+                    with archive.open(member) as raw:
+                        yield from iter_dump_labels(io.TextIOWrapper(raw, encoding="utf-8"))
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from iter_dump_labels(f)
+
+
+class DumpIngester:
+    """
+    Streams labels into bulk writes on a small worker pool. At most
+    `concurrency` batches are buffered or in flight, so peak memory depends
+    on batch size, not on how big the dump files are.
+    """
+
+    def __init__(self, drugs=None, medicines=None, batch_size=500, concurrency=4):
+        self.drugs = drugs
+        self.medicines = medicines
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.throughput = Throughput()
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+
+    def _write_batch(self, batch):
+        try:
+            if self.drugs is not None:
+                upsert_labels(self.drugs, batch)
+            if self.medicines is not None:
+                upsert_medicines(self.medicines, batch)
+            with self._lock:
+                self.throughput.add(len(batch))
+        finally:
+            self._slots.release()
+
+    def ingest(self, paths):
+        if self.drugs is not None:
+            ensure_label_indexes(self.drugs)
+        if self.medicines is not None:
+            self.medicines.create_index("name", unique=True)
+        self._futures = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for path in paths:
+                print(f"Ingesting {path}")
+                batch = []
+                for label in iter_dump_file(path):
+                    batch.append(label)
+                    if len(batch) >= self.batch_size:
+                        self._submit(pool, batch)
+                        batch = []
+                if batch:
+                    self._submit(pool, batch)
+                self.throughput.report("  ")
+        for future in self._futures:
+            future.result()  # surface write errors
+        self.throughput.report("Ingest finished: ")
+        return self.throughput.count
+
+    def _submit(self, pool, batch):
+        self._slots.acquire()  # blocks the parser while every worker is busy
+        for future in [f for f in self._futures if f.done()]:
+            future.result()  # fail fast instead of parsing the rest of the dump
+            self._futures.remove(future)
+        self._futures.append(pool.submit(self._write_batch, batch))
+
+
+def _dump_paths(patterns):
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(os.path.join(pattern, "drug-label-*.json.zip"))) \
+            if os.path.isdir(pattern) else sorted(glob.glob(pattern))
+        paths.extend(matches or [pattern])
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import openFDA drug labels into MongoDB.")
+    parser.add_argument("--search", help="openFDA search expression to restrict the import")
+    parser.add_argument("--page-size", type=int, default=100, help="labels per request (max 1000)")
+    parser.add_argument("--concurrency", type=int, default=4, help="pages fetched in parallel")
+    parser.add_argument("--batch-size", type=int, default=500, help="labels per bulk_write")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="progress file for resuming")
+    parser.add_argument("--max-docs", type=int, help="stop after roughly this many labels")
+    parser.add_argument("--reset", action="store_true", help="ignore any saved checkpoint")
+    parser.add_argument("--from-dump", nargs="+", metavar="PATH",
+                        help="ingest local drug-label-*.json.zip files (or a directory of them) instead of the API")
+    parser.add_argument("--target", choices=["drugs", "medicines", "both"], default="both",
+                        help="collections to seed in --from-dump mode")
+    args = parser.parse_args(argv)
+
+    if args.from_dump:
+        ingest_dumps(_dump_paths(args.from_dump), args.target, args.batch_size, args.concurrency)
+        return
+
+    importer = LabelImporter(
+        get_drug_collection(),
+        search=args.search,
+        page_size=args.page_size,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint,
+        max_docs=args.max_docs,
+    )
+    if args.reset:
+        importer.checkpoint.clear()
+    elif importer.checkpoint.get("done"):
+        print("Checkpoint says the last import finished; use --reset to run again.")
+        return
+    importer.run()
+
+
+def ingest_dumps(paths, target="both", batch_size=500, concurrency=4):
+    # `medicines` lives in the app database configured by MONGO_URI
+    medicines = mongo.db.medicines if target in ("medicines", "both") else None
+    drugs = get_drug_collection() if target in ("drugs", "both") else None
+    DumpIngester(drugs, medicines, batch_size, concurrency).ingest(paths)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# tests/conftest.py
+
+import os
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+import pytest
+
+from bench.fake_upstream import FakeUpstream, _Handler
+
+os.environ.setdefault("SECRET_KEY", "test")
+
+
+class _ScriptedHandler(_Handler):
+    def do_GET(self):
+        server = self.server
+        path = urlparse(self.path).path
+        with server.script_lock:
+            server.hits[path] += 1
+            statuses = server.statuses.get(path)
+            status = statuses.pop(0) if statuses else None
+        time.sleep(server.delays.get(path, 0))
+        if status:
+            return self._send(status, {"error": status})
+        super().do_GET()
+
+
+class ScriptedUpstream(FakeUpstream):
+    """
+    The benchmark's openFDA/RxNav stand-in with per-path scripting:
+    `delays[path]` seconds before every answer, and `statuses[path]`, a list
+    of error statuses returned (one per request) before normal answers.
+    """
+
+    def __init__(self):
+        super().__init__(latency=0, missing={"notarealdrug"})
+        self.RequestHandlerClass = _ScriptedHandler
+        self.hits = Counter()
+        self.delays = {}
+        self.statuses = {}
+        self.script_lock = threading.Lock()
+
+
+@pytest.fixture
+def memory_db():
+    """Point the app at an in-memory database and forget per-process state."""
+    from app import mongo, medicine_routes
+    from app.utils import search
+    from app.utils.cache import _registry
+    from app.utils.interactions import InteractionIndex
+    from app.utils.suggest import SuggestIndex
+    from bench.memory_mongo import Database
+
+    mongo.db = Database("test")
+    search._indexed.clear()
+    search._failed_at.clear()
+    for cache in _registry.values():
+        cache.clear()
+        if cache.mongo is not None:
+            cache.mongo._indexed = False
+    medicine_routes.interaction_index = InteractionIndex(lambda: mongo.db)
+    medicine_routes.suggest_index = SuggestIndex(lambda: [mongo.db.medicines])
+    yield mongo.db
+    mongo.db = None
+
+
+@pytest.fixture
+def upstream(monkeypatch, memory_db):
+    from app.utils import api_clients
+
+    server = ScriptedUpstream().start()
+    monkeypatch.setattr(api_clients, "FDA_BASE_URL", server.url)
+    monkeypatch.setattr(api_clients, "RXNAV_BASE_URL", server.url)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import create_app
+
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def client(app, memory_db):
+    return app.test_client()
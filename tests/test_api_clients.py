@@ -0,0 +1,91 @@
+# tests/test_api_clients.py
+
+import time
+
+from app.utils import api_clients
+from app.utils.api_clients import fetch_medicine_info, get_fda_data, get_rxcui
+from bench.catalogue import synthetic_label
+from openfda_import import upsert_medicines
+
+LABEL = "/drug/label.json"
+RXCUI = "/REST/rxcui.json"
+INTERACTIONS = "/REST/interaction/interaction.json"
+
+
+def test_lookup_returns_both_sides(upstream):
+    fda, interactions, degraded = fetch_medicine_info("aspirin")
+    assert fda["openfda"]["generic_name"] == ["ASPIRIN"]
+    assert len(interactions) == 3
+    assert degraded == []
+
+
+def test_both_sides_run_concurrently(upstream):
+    upstream.delays.update({LABEL: 0.3, RXCUI: 0.3})
+    started = time.perf_counter()
+    fda, interactions, degraded = fetch_medicine_info("aspirin")
+    elapsed = time.perf_counter() - started
+    assert fda and interactions and not degraded
+    # One side alone takes 0.3s; run back to back they would take 0.6s
+    assert elapsed < 0.5
+
+
+def test_slow_side_misses_deadline(upstream):
+    upstream.delays[LABEL] = 1.0
+    fda, interactions, degraded = fetch_medicine_info("ibuprofen", deadline=0.3)
+    assert fda == {}
+    assert len(interactions) == 3
+    assert degraded == ["fda"]
+
+
+def test_failing_side_is_reported(upstream):
+    upstream.statuses[LABEL] = [500] * 10
+    fda, interactions, degraded = fetch_medicine_info("naproxen")
+    assert fda == {}
+    assert len(interactions) == 3
+    assert degraded == ["fda"]
+
+
+def test_unavailable_is_retried_a_bounded_number_of_times(upstream):
+    upstream.statuses[RXCUI] = [503] * 10
+    assert get_rxcui("warfarin") is None
+    assert upstream.hits[RXCUI] == api_clients.UPSTREAM_RETRIES + 1
+
+
+def test_transient_unavailable_recovers(upstream):
+    upstream.statuses[RXCUI] = [503]
+    assert get_rxcui("warfarin")
+    assert upstream.hits[RXCUI] == 2
+
+
+def test_not_found_maps_to_empty(upstream):
+    assert get_fda_data("notarealdrug") == {}
+    fda, interactions, degraded = fetch_medicine_info("notarealdrug")
+    assert (fda, interactions, degraded) == ({}, [], [])
+
+
+def test_degraded_lookup_is_not_stored(upstream, client, memory_db):
+    upstream.statuses[LABEL] = [500] * 10
+    response = client.get("/medicine/search", query_string={"query": "metformin"})
+    assert response.status_code == 200
+    assert b"may be incomplete" in response.data
+    assert memory_db.medicines.find_one({"name": "metformin"}) is None
+
+    # Once the label comes back the lookup is complete and stored
+    upstream.statuses[LABEL] = []
+    client.get("/medicine/search", query_string={"query": "metformin"})
+    stored = memory_db.medicines.find_one({"name": "metformin"})
+    assert stored["label_id"] == "bench-metformin"
+
+
+def test_seeded_label_fetches_interactions_on_first_search(upstream, client, memory_db):
+    upsert_medicines(memory_db.medicines, [synthetic_label("metformin")])
+    assert "interactions" not in memory_db.medicines.find_one({"name": "metformin"})
+
+    assert client.get("/medicine/search", query_string={"query": "metformin"}).status_code == 200
+    assert upstream.hits[LABEL] == 0
+    stored = memory_db.medicines.find_one({"name": "metformin"})
+    assert stored["interactions"]
+
+    # Complete now: later searches are answered from the stored document
+    client.get("/medicine/search", query_string={"query": "metformin"})
+    assert upstream.hits[INTERACTIONS] == 1
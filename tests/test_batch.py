@@ -0,0 +1,61 @@
+# tests/test_batch.py
+
+import json
+
+import pytest
+
+from app import medicine_routes
+from app.medicine_routes import store_medicine
+from bench.catalogue import synthetic_label
+
+LABEL = "/drug/label.json"
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def _store(app, name):
+    with app.app_context():
+        store_medicine(name, synthetic_label(name), ["Interaction between a and b."])
+
+
+def test_inputs_are_normalized_and_grouped(upstream, client):
+    response = client.post("/medicine/batch", json={"names": ["Aspirin", " aspirin ", "ASPIRIN", "ibuprofen"]})
+    assert response.status_code == 200
+    lines = {line["name"]: line for line in _lines(response)}
+    assert set(lines) == {"aspirin", "ibuprofen"}
+    assert lines["aspirin"]["inputs"] == ["Aspirin", " aspirin ", "ASPIRIN"]
+    # One upstream lookup per distinct name
+    assert upstream.hits[LABEL] == 2
+
+
+def test_cache_hits_stream_before_upstream_lookups(app, upstream, client):
+    _store(app, "metformin")
+    _store(app, "warfarin")
+    upstream.delays[LABEL] = 0.2
+    lines = _lines(client.post("/medicine/batch", json={"names": ["aspirin", "metformin", "warfarin"]}))
+    assert [line["source"] for line in lines] == ["cache", "cache", "upstream"]
+    assert {line["name"] for line in lines[:2]} == {"metformin", "warfarin"}
+    assert all(line["found"] for line in lines)
+    assert lines[0]["result"]["interactions"] == ["Interaction between a and b."]
+
+
+def test_failed_upstream_side_is_reported_as_degraded(upstream, client, memory_db):
+    upstream.statuses[LABEL] = [500] * 10
+    (line,) = _lines(client.post("/medicine/batch", json={"names": ["aspirin"]}))
+    assert line["degraded"] == ["fda"]
+    assert memory_db.medicines.find_one({"name": "aspirin"}) is None
+
+
+def test_batch_size_is_limited(upstream, client, monkeypatch):
+    monkeypatch.setattr(medicine_routes, "MAX_BATCH_NAMES", 3)
+    response = client.post("/medicine/batch", json={"names": ["a", "b", "c", "d"]})
+    assert response.status_code == 400
+    # Duplicates count once
+    assert client.post("/medicine/batch", json={"names": ["a", "A", "a "]}).status_code == 200
+
+
+@pytest.mark.parametrize("body", [["aspirin"], {"names": "aspirin"}, {"names": []}, {}])
+def test_malformed_body_is_rejected(client, body):
+    assert client.post("/medicine/batch", json=body).status_code == 400
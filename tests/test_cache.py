@@ -0,0 +1,95 @@
+# tests/test_cache.py
+
+import threading
+import time
+
+import pytest
+
+from app.utils.cache import LRUCache, SingleFlight, TieredCache
+from bench.memory_mongo import Database
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1, 60)
+    cache.set("b", 2, 60)
+    assert cache.get("a") == (True, 1)
+    cache.set("c", 3, 60)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+
+
+def test_lru_expires_entries():
+    cache = LRUCache()
+    cache.set("a", 1, 0.05)
+    time.sleep(0.1)
+    assert cache.get("a") == (False, None)
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+    results = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return "value"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", fetch))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {value for value, _ in results} == {"value"}
+
+
+def _cache(name, **kwargs):
+    database = Database("test")
+    cache = TieredCache(name, mongo_collection=lambda: database["api_cache"], **kwargs)
+    return cache, database
+
+
+def test_tiered_cache_memory_then_mongo_hits():
+    cache, database = _cache("test_tiers")
+    calls = []
+    fetch = lambda: calls.append(1) or {"id": 1}
+    assert cache.get_or_fetch("k", fetch) == {"id": 1}
+    assert cache.get_or_fetch("k", fetch) == {"id": 1}
+    # A fresh process (empty memory tier) is answered from Mongo
+    cache.clear()
+    assert cache.get_or_fetch("k", fetch) == {"id": 1}
+    assert len(calls) == 1
+    assert database["api_cache"].find_one({"key": "test_tiers:k"}) is not None
+    stats = cache.stats()
+    assert (stats["misses"], stats["memory_hits"], stats["mongo_hits"]) == (1, 1, 1)
+
+
+def test_tiered_cache_stores_negatives_with_short_ttl():
+    cache, _ = _cache("test_negative", ttl=3600, negative_ttl=0.05)
+    calls = []
+    fetch = lambda: calls.append(1) or {}
+    cache.get_or_fetch("k", fetch)
+    cache.get_or_fetch("k", fetch)
+    assert len(calls) == 1
+    assert cache.stats()["negative_stores"] == 1
+    time.sleep(0.1)
+    cache.clear()
+    cache.get_or_fetch("k", fetch)
+    assert len(calls) == 2
+
+
+def test_tiered_cache_never_caches_errors():
+    cache, _ = _cache("test_errors")
+
+    def failing():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch("k", failing)
+    assert cache.get_or_fetch("k", lambda: "ok") == "ok"
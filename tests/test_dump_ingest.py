@@ -0,0 +1,62 @@
+# tests/test_dump_ingest.py
+
+import io
+import json
+import zipfile
+
+import pytest
+
+import openfda_import
+from bench.catalogue import catalogue
+from bench.memory_mongo import Database
+from openfda_import import DumpIngester, _JSONStream, iter_dump_file, iter_dump_labels
+
+
+@pytest.fixture(params=[1, 7, 1 << 16], ids=["chunk1", "chunk7", "chunk64k"])
+def chunk(request, monkeypatch):
+    # Tiny reads make every token straddle a buffer boundary at some point
+    monkeypatch.setattr(openfda_import, "READ_CHUNK", request.param)
+    return request.param
+
+
+def test_stream_decodes_values_across_chunk_boundaries(chunk):
+    reader = _JSONStream(io.StringIO('  12345 , "a \\"quoted\\" string" {"x": [1.5, -2e3]}  67890'))
+    assert reader.value() == 12345
+    reader.expect(",")
+    assert reader.value() == 'a "quoted" string'
+    assert reader.value() == {"x": [1.5, -2e3]}
+    assert reader.value() == 67890  # a number ending exactly at EOF
+    assert reader.next_char() == ""
+
+
+def test_labels_are_streamed_in_order(chunk):
+    labels = list(catalogue(5))
+    dump = json.dumps({"meta": {"results": {"total": 5}}, "results": labels, "trailer": [1, 2]})
+    assert list(iter_dump_labels(io.StringIO(dump))) == labels
+
+
+def test_results_before_meta_and_empty_results(chunk):
+    assert list(iter_dump_labels(io.StringIO('{"results": [], "meta": {}}'))) == []
+    dump = json.dumps({"results": [{"id": "a"}, {"id": "b"}], "meta": {"disclaimer": "x" * 50}})
+    assert [label["id"] for label in iter_dump_labels(io.StringIO(dump))] == ["a", "b"]
+
+
+def test_malformed_dump_raises(chunk):
+    with pytest.raises(ValueError):
+        list(iter_dump_labels(io.StringIO('["not", "an", "object"]')))
+
+
+def test_zip_dump_ingests_every_member(tmp_path):
+    labels = list(catalogue(12))
+    path = tmp_path / "drug-label-0001-of-0001.json.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("part1.json", json.dumps({"meta": {}, "results": labels[:7]}))
+        archive.writestr("part2.json", json.dumps({"meta": {}, "results": labels[7:]}))
+    assert [label["id"] for label in iter_dump_file(str(path))] == [label["id"] for label in labels]
+
+    database = Database("test")
+    written = DumpIngester(database.drugs, database.medicines, batch_size=5, concurrency=2).ingest([str(path)])
+    assert written == 12
+    assert database.drugs.count_documents({}) == 12
+    assert database.medicines.count_documents({}) == 12
+    assert database.label_blobs.count_documents({}) == 12
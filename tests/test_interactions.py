@@ -0,0 +1,85 @@
+# tests/test_interactions.py
+
+import pytest
+
+from app.utils.interactions import InteractionIndex, normalize_pairs, pair_key
+
+
+def _pair(a, b, severity="N/A", description=None):
+    return {
+        "description": description or f"{a} + {b}",
+        "severity": severity,
+        "concepts": [{"rxcui": a, "name": f"drug {a}"}, {"rxcui": b, "name": f"drug {b}"}],
+    }
+
+
+def test_pair_key_is_order_independent():
+    assert pair_key("20", "10") == pair_key(10, 20) == ("10", "20")
+
+
+def test_normalize_pairs_keeps_the_most_severe_description():
+    docs = normalize_pairs([_pair("1", "2", "N/A", "minor"), _pair("2", "1", "high", "major"), {"concepts": []}])
+    assert len(docs) == 1
+    assert (docs[0]["rxcui_a"], docs[0]["rxcui_b"], docs[0]["description"]) == ("1", "2", "major")
+
+
+def test_check_finds_pairs_among_requested_drugs_only(memory_db):
+    index = InteractionIndex(lambda: memory_db)
+    index.add("1", [_pair("1", "2"), _pair("1", "3", "high"), _pair("1", "9")])
+    index.add("4", [_pair("4", "2")])
+
+    found = index.check(["1", "2", "3", "4"])
+    assert [(d["rxcui_a"], d["rxcui_b"]) for d in found] == [("1", "3"), ("1", "2"), ("2", "4")]
+    assert index.check(["2", "1"]) == index.check(["1", "2"])
+    assert index.check(["9", "4"]) == []
+    assert index.check(["1"]) == []
+
+
+def test_new_process_loads_the_index_from_mongo(memory_db):
+    InteractionIndex(lambda: memory_db).add("1", [_pair("1", "2")])
+    fresh = InteractionIndex(lambda: memory_db)
+    assert fresh.is_indexed("1") and not fresh.is_indexed("2")
+    assert len(fresh.check(["1", "2"])) == 1
+
+
+def test_interactions_endpoint_fetches_unindexed_drugs(upstream, client):
+    # The fake RxNav reports interactions between an RxCUI and the next three
+    response = client.get("/medicine/interactions", query_string={"drugs": "100000,100002,555555"})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [(i["rxcui_a"], i["rxcui_b"]) for i in body["interactions"]] == [("100000", "100002")]
+
+    # Already indexed: answered without going upstream again
+    hits = upstream.hits["/REST/interaction/interaction.json"]
+    client.get("/medicine/interactions", query_string={"drugs": "100000,100002"})
+    assert upstream.hits["/REST/interaction/interaction.json"] == hits
+
+
+def test_interactions_endpoint_needs_two_drugs(client):
+    assert client.get("/medicine/interactions", query_string={"drugs": "100000"}).status_code == 400
+
+
+def test_interactions_endpoint_reports_drugs_it_could_not_check(upstream, client):
+    upstream.statuses["/REST/interaction/interaction.json"] = [500] * 10
+    response = client.get("/medicine/interactions", query_string={"drugs": "100000,100002"})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["interactions"] == []
+    assert body["unchecked"] == ["100000", "100002"]
+
+    # The failure was not remembered as "no interactions"
+    upstream.statuses["/REST/interaction/interaction.json"] = []
+    body = client.get("/medicine/interactions", query_string={"drugs": "100000,100002"}).get_json()
+    assert "unchecked" not in body
+    assert [(i["rxcui_a"], i["rxcui_b"]) for i in body["interactions"]] == [("100000", "100002")]
+
+
+def test_drug_without_interactions_is_indexed(upstream, memory_db):
+    index = InteractionIndex(lambda: memory_db)
+    index.refresh("abc")  # the fake RxNav has no interactions for non-numeric ids
+    assert index.is_indexed("abc")
+
+
+@pytest.mark.parametrize("body", [{"drugs": 5}, ["100000", "100002"], {"names": ["a", "b"]}, "100000"])
+def test_interactions_endpoint_rejects_malformed_json(client, body):
+    assert client.post("/medicine/interactions", json=body).status_code == 400
@@ -0,0 +1,31 @@
+# tests/test_labels.py
+
+from flask import url_for
+
+from app.utils.labels import (SUMMARY_TEXT_LIMIT, compress_label, decompress_label, label_to_medicine,
+                              load_label, store_label_blobs)
+from bench.catalogue import synthetic_label
+
+
+def test_summary_is_capped_and_blob_round_trips(memory_db):
+    label = synthetic_label("aspirin")
+    label["indications_and_usage"] = ["word " * 1000]
+    doc = label_to_medicine(label)
+    assert len(doc["indications"]) <= SUMMARY_TEXT_LIMIT + 1
+    assert decompress_label(compress_label(label)) == label
+    store_label_blobs(memory_db, [label])
+    assert load_label(memory_db, label["id"]) == label
+
+
+def test_label_detail_accepts_names_with_slashes(app, client, memory_db):
+    name = "trimethoprim/sulfa"
+    label = synthetic_label(name)
+    store_label_blobs(memory_db, [label])
+    memory_db.medicines.insert_one(label_to_medicine(label, name=name))
+
+    with app.test_request_context():
+        url = url_for("medicine.label_detail", name=name)
+    assert url == "/medicine/label/trimethoprim/sulfa"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert b"trimethoprim/sulfa" in response.data
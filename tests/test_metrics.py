@@ -0,0 +1,50 @@
+# tests/test_metrics.py
+
+import time
+
+from flask import Response
+
+from app import create_app
+from app.metrics import RequestSpans, render_metrics, request_latency
+
+
+def _series(route):
+    for key, series in request_latency._series.items():
+        if key[1] == route:
+            return series
+    return None
+
+
+def test_streamed_responses_are_timed_to_the_last_chunk():
+    app = create_app()
+
+    @app.route("/_test/stream")
+    def stream():
+        def generate():
+            yield "a\n"
+            time.sleep(0.2)
+            yield "b\n"
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    response = app.test_client().get("/_test/stream")
+    assert response.data == b"a\nb\n"
+    response.close()  # what the WSGI server does once the body is sent
+    series = _series("/_test/stream")
+    assert series["count"] == 1
+    assert series["sum"] >= 0.2
+
+
+def test_plain_responses_are_timed_once(client):
+    before = (_series("/metrics") or {"count": 0})["count"]
+    assert client.get("/metrics").status_code == 200
+    assert _series("/metrics")["count"] == before + 1
+
+
+def test_spans_and_metrics_text():
+    spans = RequestSpans()
+    spans.add("mongo", 0.002)
+    spans.add("mongo", 0.003)
+    assert spans.summary() == "mongo=5.0ms/2"
+    text = render_metrics()
+    assert "# TYPE medinfo_http_request_duration_seconds histogram" in text
+    assert "medinfo_cache_events_total" in text
@@ -0,0 +1,113 @@
+# tests/test_openfda_import.py
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import openfda_import
+from bench.catalogue import catalogue
+from bench.memory_mongo import Database
+from openfda_import import LabelImporter
+
+TOTAL = 50
+PAGE = 10
+
+
+class _LabelPages(BaseHTTPRequestHandler):
+    """/drug/label.json over a fixed catalogue, paged by skip or by search_after links."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        limit = int(query.get("limit", 1))
+        start = int(query.get("search_after", query.get("skip", 0)))
+        with server.lock:
+            server.starts.append(start)
+        if start in server.fail_at:
+            return self._send(500, {"error": "boom"})
+        results = server.labels[start:start + limit]
+        headers = {}
+        if "skip" not in query and start + limit < len(server.labels):
+            headers["Link"] = f'<{server.url}/drug/label.json?limit={limit}&search_after={start + limit}>; rel="next"'
+        self._send(200, {"meta": {"results": {"total": len(server.labels)}}, "results": results}, headers)
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def openfda(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _LabelPages)
+    server.daemon_threads = True
+    server.labels = list(catalogue(TOTAL))
+    server.starts = []
+    server.fail_at = set()
+    server.lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(openfda_import, "FDA_BASE_URL", server.url)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _importer(collection, checkpoint):
+    return LabelImporter(collection, page_size=PAGE, concurrency=2, batch_size=PAGE,
+                         checkpoint_path=str(checkpoint))
+
+
+def test_skip_import_resumes_from_checkpoint(openfda, tmp_path):
+    drugs = Database("test").drugs
+    checkpoint = tmp_path / "checkpoint.json"
+    openfda.fail_at = {30}
+    with pytest.raises(Exception):
+        _importer(drugs, checkpoint).run()
+    assert json.loads(checkpoint.read_text())["skip"] == 30
+    assert drugs.count_documents({}) == 30
+
+    openfda.fail_at = set()
+    openfda.starts.clear()
+    _importer(drugs, checkpoint).run()
+    assert sorted(openfda.starts) == [0, 30, 40]  # total probe, then only pages after the checkpoint
+    assert drugs.count_documents({}) == TOTAL
+    assert json.loads(checkpoint.read_text())["done"] is True
+
+
+def test_link_import_resumes_from_checkpoint(openfda, tmp_path, monkeypatch):
+    monkeypatch.setattr(openfda_import, "MAX_SKIP", 0)  # force search_after paging
+    drugs = Database("test").drugs
+    checkpoint = tmp_path / "checkpoint.json"
+    openfda.fail_at = {40}
+    with pytest.raises(Exception):
+        _importer(drugs, checkpoint).run()
+    saved = json.loads(checkpoint.read_text())["next_url"]
+    assert saved.endswith("search_after=30")
+
+    openfda.fail_at = set()
+    openfda.starts.clear()
+    _importer(drugs, checkpoint).run()
+    assert openfda.starts == [0, 30, 40]  # total probe, then the saved page onwards
+    assert drugs.count_documents({}) == TOTAL
+
+
+def test_rerunning_an_import_upserts_instead_of_duplicating(openfda, tmp_path):
+    drugs = Database("test").drugs
+    _importer(drugs, tmp_path / "a.json").run()
+    _importer(drugs, tmp_path / "b.json").run()
+    assert drugs.count_documents({}) == TOTAL
@@ -0,0 +1,113 @@
+# tests/test_search.py
+
+import pytest
+from pymongo.errors import PyMongoError
+
+from app.utils import search
+from app.utils.search import decode_cursor, encode_cursor, ensure_search_indexes, search_medicines
+from bench.memory_mongo import Database
+
+
+@pytest.fixture(autouse=True)
+def _fresh_index_state():
+    search._indexed.clear()
+    search._failed_at.clear()
+
+
+@pytest.fixture
+def medicines():
+    collection = Database("test").medicines
+    ensure_search_indexes(collection)
+    for i in range(25):
+        collection.insert_one({"name": f"ibuprofen {i:02d}", "indications": "pain and fever"})
+    collection.insert_one({"name": "fever reducer", "indications": "headache"})
+    return collection
+
+
+def _all_pages(collection, query, limit):
+    names, cursor = [], None
+    while True:
+        results, cursor = search_medicines(collection, query, cursor=cursor, limit=limit)
+        names += [r["name"] for r in results]
+        if cursor is None:
+            return names
+
+
+def test_text_search_pages_without_gaps_or_repeats(medicines):
+    first, cursor = search_medicines(medicines, "ibuprofen", limit=10)
+    assert len(first) == 10 and cursor
+    names = _all_pages(medicines, "ibuprofen", 10)
+    assert len(names) == len(set(names)) == 25
+
+
+def test_text_search_ranks_name_matches_first(medicines):
+    results, _ = search_medicines(medicines, "fever", limit=5)
+    assert results[0]["name"] == "fever reducer"
+    assert len(results) == 5
+
+
+def test_prefix_fallback_pages_by_name(medicines):
+    names = _all_pages(medicines, "ibupro", 7)
+    assert names == sorted(f"ibuprofen {i:02d}" for i in range(25))
+
+
+def test_garbled_cursor_starts_over(medicines):
+    assert decode_cursor("not-a-cursor") is None
+    assert decode_cursor(encode_cursor({"n": "ibuprofen 03"})) == {"n": "ibuprofen 03"}
+    results, _ = search_medicines(medicines, "ibuprofen", cursor="%%%", limit=3)
+    assert len(results) == 3
+
+
+def test_failed_index_creation_is_retried(monkeypatch):
+    collection = Database("test").medicines
+    real_create_index = collection.create_index
+    attempts = []
+
+    def flaky_create_index(*args, **kwargs):
+        attempts.append(args)
+        if len(attempts) == 1:
+            raise PyMongoError("not primary")
+        return real_create_index(*args, **kwargs)
+
+    collection.create_index = flaky_create_index
+    ensure_search_indexes(collection)
+    assert (collection.full_name, "text") not in search._indexed
+    assert (collection.full_name, "name") in search._indexed
+    # Backed off: no round trip until the retry interval has passed
+    ensure_search_indexes(collection)
+    assert len(attempts) == 2
+    monkeypatch.setattr(search, "INDEX_RETRY_SECONDS", 0)
+    ensure_search_indexes(collection)
+    assert (collection.full_name, "text") in search._indexed
+    assert len(attempts) == 3
+
+
+def _with_duplicates():
+    collection = Database("test").medicines
+    for name in ("aspirin", "aspirin", "ibuprofen"):
+        collection.insert_one({"name": name, "indications": "pain"})
+    return collection
+
+
+def test_duplicate_names_do_not_block_the_text_index():
+    collection = _with_duplicates()
+    ensure_search_indexes(collection)
+    assert (collection.full_name, "text") in search._indexed
+    assert (collection.full_name, "name") not in search._indexed
+    results, _ = search_medicines(collection, "pain")
+    assert len(results) == 3
+
+
+def test_dedupe_keeps_the_oldest_document_per_name():
+    collection = _with_duplicates()
+    oldest = collection.find_one({"name": "aspirin"})["_id"]
+    ensure_search_indexes(collection, dedupe=True)
+    assert (collection.full_name, "name") in search._indexed
+    assert [d["_id"] for d in collection.find({"name": "aspirin"})] == [oldest]
+    assert collection.count_documents({}) == 2
+
+
+def test_text_search_falls_back_to_prefix_without_text_index(medicines):
+    medicines.drop_index(search.TEXT_INDEX_NAME)
+    results, _ = search_medicines(medicines, "ibupro", limit=5)
+    assert [r["name"] for r in results] == [f"ibuprofen {i:02d}" for i in range(5)]
@@ -0,0 +1,148 @@
+# tests/test_suggest.py
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson.objectid import ObjectId
+
+from app.utils.labels import label_to_drug
+from app.utils.suggest import SuggestIndex
+from bench.catalogue import synthetic_label
+from bench.memory_mongo import Database
+
+
+def _texts(results):
+    return [r["text"] for r in results]
+
+
+def _index(*names):
+    index = SuggestIndex(lambda: [])
+    for name in names:
+        index.add(name, name)
+    return index
+
+
+def test_prefix_matches_rank_by_popularity():
+    index = _index("ibuprofen", "ibandronate", "ibrutinib", "aspirin")
+    index.bump("ibrutinib", 10)
+    assert _texts(index.suggest("ib", 2)) == ["ibrutinib", "ibandronate"]
+    results = index.suggest("IBU")
+    assert results[0] == {"text": "ibuprofen", "name": "ibuprofen", "kind": "generic", "fuzzy": False}
+    assert all(r["fuzzy"] for r in results[1:])  # "ibr..."/"iba..." are one letter off
+    assert index.suggest("") == []
+
+
+def test_wide_prefixes_stay_current_after_adds_and_bumps():
+    index = _index(*[f"a{i:04d}" for i in range(1000)])
+    index.load()  # caches the top lists of wide prefixes
+    index.add("a9999", "a9999", weight=50)
+    assert _texts(index.suggest("a", 1)) == ["a9999"]
+    index.bump("a0500", 100)
+    assert _texts(index.suggest("a", 2)) == ["a0500", "a9999"]
+
+
+def test_load_sorts_the_full_build_once():
+    names = [f"c{(i * 7919) % 5000:04d}" for i in range(5000)]  # out of order
+    index = SuggestIndex(lambda: [_SlowCollection([{"_id": ObjectId(), "name": n} for n in names], 0)])
+    index.add("c9999", "c9999", weight=50)  # stored live before the first load
+    index.load()
+    assert index._keys == sorted(set(names) | {"c9999"})
+    assert _texts(index.suggest("c", 1)) == ["c9999"]
+    index.add("c5000", "c5000")  # incremental adds keep the order
+    assert index._keys == sorted(index._keys)
+
+
+def test_one_typo_still_suggests():
+    index = _index("metformin", "metoprolol", "methotrexate")
+    results = index.suggest("metfromin")  # transposition
+    assert results[0]["text"] == "metformin" and results[0]["fuzzy"]
+    assert _texts(index.suggest("mtformin")) == ["metformin"]  # deletion
+    assert _texts(index.suggest("metxormin")) == ["metformin"]  # replacement
+    assert not index.suggest("mxyzptlk")
+
+
+def test_documents_contribute_generic_brand_and_synonym_names():
+    database = Database("test")
+    label = synthetic_label("acetaminophen")
+    label["openfda"].update(brand_name=["Tylenol"], substance_name=["PARACETAMOL"])
+    database.drugs.insert_one(label_to_drug(label))
+    # Unmigrated documents: raw openfda at the top (drugs) or under fda (medicines)
+    database.drugs.insert_one({"id": "raw", "openfda": {"generic_name": ["NAPROXEN"], "brand_name": ["Aleve"]}})
+    database.medicines.insert_one({"name": "warfarin", "fda": {"openfda": {"brand_name": ["Coumadin"]}}})
+
+    index = SuggestIndex(lambda: [database.medicines, database.drugs])
+    index.load()
+    kinds = {r["text"]: (r["kind"], r["name"]) for q in ("t", "p", "a", "n", "c") for r in index.suggest(q)}
+    assert kinds["tylenol"] == ("brand", "acetaminophen")
+    assert kinds["paracetamol"] == ("synonym", "acetaminophen")
+    assert kinds["aleve"] == ("brand", "naproxen")
+    assert kinds["coumadin"] == ("brand", "warfarin")
+
+
+def test_refresh_picks_up_new_and_out_of_order_documents_once():
+    database = Database("test")
+    database.medicines.insert_one({"name": "aspirin"})
+    index = SuggestIndex(lambda: [database.medicines])
+    index.load()
+
+    database.medicines.insert_one({"name": "atenolol"})
+    # Committed after the last refresh, but with an older _id (another process's clock)
+    late_id = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(minutes=2))
+    database.medicines.insert_one({"_id": late_id, "name": "amlodipine"})
+    index.refresh()
+    index.refresh()
+    assert sorted(_texts(index.suggest("a"))) == ["amlodipine", "aspirin", "atenolol"]
+    assert index._entries["aspirin"]["weight"] == 1  # overlapping refreshes count a document once
+
+
+class _SlowCollection:
+    full_name = "test.slow"
+
+    def __init__(self, docs, delay):
+        self.docs, self.delay = docs, delay
+
+    def find(self, query, projection):
+        time.sleep(self.delay)
+        return iter(self.docs)
+
+
+def test_first_request_does_not_wait_for_the_load():
+    index = SuggestIndex(lambda: [_SlowCollection([{"_id": ObjectId(), "name": "aspirin"}], 0.5)])
+    started = time.perf_counter()
+    index.maybe_refresh()
+    assert time.perf_counter() - started < 0.1
+    assert index.suggest("asp") == []
+    deadline = time.monotonic() + 5
+    while not index.suggest("asp") and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _texts(index.suggest("asp")) == ["aspirin"]
+
+
+def test_readers_never_see_partial_top_lists():
+    index = _index(*[f"b{i:05d}" for i in range(2000)])
+    index.load()
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            index.add(f"b{i % 2000:05d}", None)
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(3000):
+            assert len(index.suggest("b", 10)) == 10
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_suggest_endpoint(client, memory_db):
+    memory_db.medicines.insert_one({"name": "ibuprofen", "brand_names": ["advil"]})
+    from app import medicine_routes
+    medicine_routes.suggest_index.load()
+    body = client.get("/medicine/suggest", query_string={"q": "adv"}).get_json()
+    assert body["suggestions"][0] == {"text": "advil", "name": "ibuprofen", "kind": "brand", "fuzzy": False}